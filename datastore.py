@@ -0,0 +1,188 @@
+'''
+Base de dados local: um CSV de OHLCV por ativo na pasta "dados/".
+
+Para popular a base:
+    python datastore.py PETR4.SA VALE3.SA ITUB4.SA --inicio 2005-01-01
+
+O scanner, o export e o agregador de ticks leem/escrevem aqui.
+'''
+import io
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "dados")
+COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def symbol_path(symbol, data_dir=DATA_DIR):
+    # "BMFBOVESPA:PETR4" não é nome de arquivo válido em todo sistema
+    return os.path.join(data_dir, symbol.replace(":", "_").replace("/", "_") + ".csv")
+
+
+def list_symbols(data_dir=DATA_DIR):
+    if not os.path.isdir(data_dir):
+        return []
+    return sorted(name[:-4] for name in os.listdir(data_dir) if name.endswith(".csv"))
+
+
+def has_symbol(symbol, data_dir=DATA_DIR):
+    return os.path.exists(symbol_path(symbol, data_dir))
+
+
+def save(symbol, df, data_dir=DATA_DIR):
+    os.makedirs(data_dir, exist_ok=True)
+    df[COLUMNS].to_csv(symbol_path(symbol, data_dir), index=False)
+
+
+def append(symbol, df, data_dir=DATA_DIR):
+    # Acrescenta candles no fim do arquivo (usado para gravar em streaming)
+    os.makedirs(data_dir, exist_ok=True)
+    path = symbol_path(symbol, data_dir)
+    df[COLUMNS].to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+
+def pop_last(symbol, data_dir=DATA_DIR):
+    # Tira o último candle do arquivo e devolve como DataFrame de uma linha (None se
+    # não houver). Quem anexa em streaming reabre esse candle e grava de novo.
+    path = symbol_path(symbol, data_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb+') as f:
+        header = f.readline()
+        start = f.tell()
+        size = f.seek(0, os.SEEK_END)
+        if size <= start:
+            return None
+        block = min(size - start, 64 * 1024)
+        f.seek(size - block)
+        tail = f.read().rstrip(b"\r\n")
+        if not tail:
+            return None
+        cut = tail.rfind(b"\n") + 1  # 0: a última linha é a única depois do cabeçalho
+        f.truncate(size - block + cut)
+
+    return pd.read_csv(io.BytesIO(header + tail[cut:]), parse_dates=['Date'])
+
+
+def load(symbol, start=None, end=None, data_dir=DATA_DIR):
+    df = pd.read_csv(symbol_path(symbol, data_dir), parse_dates=['Date'])
+    if start is not None:
+        df = df[df['Date'] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df['Date'] < pd.Timestamp(end)]
+    return df.reset_index(drop=True)
+
+
+def download(symbol, start, end=None, data_dir=DATA_DIR):
+    import yfinance as yf
+
+    end = end or datetime.now().strftime('%Y-%m-%d')
+    df = yf.download(symbol, start=start, end=end, progress=False)
+    if df.empty:
+        return df
+
+    df = df.reset_index()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    save(symbol, df, data_dir)
+    return df[COLUMNS]
+
+
+def compact(df):
+    # Modo compacto: preços e indicadores em float32, volume inteiro e Date como
+    # inteiro (dias desde 1970 para diário, segundos para intraday). O cálculo
+    # dos indicadores continua em float64; só o armazenamento é reduzido.
+    dates = pd.DatetimeIndex(df['Date'])
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    ns = dates.as_unit('ns').asi8
+
+    day_ns = 86400 * 10**9
+    if (ns % day_ns == 0).all():
+        unit, values = 'D', (ns // day_ns).astype(np.int32)
+    else:
+        seconds = ns // 10**9
+        unit = 's'
+        values = seconds.astype(np.uint32) if seconds.min() >= 0 and seconds.max() < 2**32 else seconds
+
+    out = pd.DataFrame({'Date': values})
+    for col in df.columns:
+        if col == 'Date':
+            continue
+        if col == 'Volume':
+            volume = np.nan_to_num(df[col].to_numpy(dtype=float)).astype(np.int64)
+            out[col] = volume.astype(np.int32) if volume.max(initial=0) < 2**31 else volume
+        elif pd.api.types.is_float_dtype(df[col]):
+            out[col] = df[col].to_numpy(dtype=np.float32)
+        else:
+            out[col] = df[col].to_numpy()
+
+    out.attrs['date_unit'] = unit
+    return out
+
+
+def load_arrays(symbol, data_dir=DATA_DIR):
+    # Colunas do ativo como arrays (Date em int64 ns). Guarda um .npz ao lado do
+    # CSV para as próximas leituras não precisarem parsear texto de novo.
+    path = symbol_path(symbol, data_dir)
+    cache = path[:-4] + ".npz"
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        with np.load(cache) as z:
+            return {name: z[name] for name in z.files}
+
+    df = pd.read_csv(path, parse_dates=['Date'])
+    df = df.drop_duplicates('Date', keep='last').sort_values('Date')
+    arrays = {'Date': df['Date'].to_numpy(dtype='datetime64[ns]').view('i8')}
+    for col in COLUMNS[1:]:
+        arrays[col] = df[col].to_numpy(dtype=float)
+    np.savez(cache, **arrays)
+    return arrays
+
+
+def load_universe(symbols=None, start=None, end=None, fields=('Open', 'High', 'Low', 'Close', 'Volume'),
+                  data_dir=DATA_DIR):
+    # Carrega vários ativos em matrizes datas x símbolos (NaN onde o ativo não negociou)
+    symbols = list(symbols) if symbols is not None else list_symbols(data_dir)
+    lo = pd.Timestamp(start).value if start is not None else None
+    hi = pd.Timestamp(end).value if end is not None else None
+
+    loaded = []
+    columns = []
+    for symbol in symbols:
+        arrays = load_arrays(symbol, data_dir)
+        dates = arrays['Date']
+        i0 = np.searchsorted(dates, lo) if lo is not None else 0
+        i1 = np.searchsorted(dates, hi) if hi is not None else len(dates)
+        if i1 <= i0:
+            continue
+        columns.append({name: values[i0:i1] for name, values in arrays.items()})
+        loaded.append(symbol)
+
+    if not loaded:
+        return pd.DatetimeIndex([]), [], {field: np.empty((0, 0)) for field in fields}
+
+    # Relógio comum = união das datas; cada ativo entra na sua posição via searchsorted
+    all_dates = np.unique(np.concatenate([c['Date'] for c in columns]))
+    out = {field: np.full((len(all_dates), len(loaded)), np.nan) for field in fields}
+    for j, c in enumerate(columns):
+        rows = np.searchsorted(all_dates, c['Date'])
+        for field in fields:
+            out[field][rows, j] = c[field]
+
+    return pd.DatetimeIndex(all_dates.view('datetime64[ns]')), loaded, out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baixa ativos para a base local")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--inicio", default="2005-01-01")
+    parser.add_argument("--fim", default=None)
+    args = parser.parse_args()
+
+    for ticker in args.tickers:
+        df = download(ticker, args.inicio, args.fim)
+        print(f"{ticker}: {len(df)} candles")
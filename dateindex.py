@@ -0,0 +1,91 @@
+'''
+Índice de datas ordenado com buscas O(log n) via searchsorted.
+
+Todas as conversões data -> candle do simulador passam por aqui (marcadores
+de trade, "ir para data", sinais do scanner), em vez de comparar a coluna
+Date inteira a cada frame.
+
+No modo compacto (datastore.compact) a coluna Date já é inteira (dias ou
+segundos desde 1970) e o índice usa esse array direto, sem cópia.
+'''
+import numpy as np
+import pandas as pd
+
+# Nanossegundos por unidade da coluna Date
+UNIT_NS = {'ns': 1, 's': 10**9, 'D': 86400 * 10**9}
+
+
+def to_ns(date):
+    return pd.Timestamp(date).as_unit('ns').value
+
+
+def parse_date(text):
+    # Data digitada: ISO (2023-01-05, como o campo "Data Início") ou dd/mm/aaaa.
+    # Formato fixo por tentativa: dayfirst no ISO trocaria dia e mês (05/01 -> 01/05)
+    text = text.strip()
+    for fmt in ('ISO8601', '%d/%m/%Y'):
+        try:
+            date = pd.to_datetime(text, format=fmt)
+        except (ValueError, TypeError):
+            continue
+        if not pd.isna(date):  # "" vira NaT em vez de erro
+            return date
+    raise ValueError(f"Data inválida: {text!r}")
+
+
+def date_at(df, i):
+    # Data do candle i como Timestamp, com Date em datetime ou inteira (modo compacto)
+    value = df['Date'].iloc[i]
+    unit = df.attrs.get('date_unit')
+    if unit is None:
+        return value
+    return pd.Timestamp(int(value) * UNIT_NS[unit])
+
+
+class DateIndex:
+    def __init__(self, dates, unit='ns'):
+        if unit == 'ns':
+            self.values = pd.DatetimeIndex(dates).as_unit('ns').asi8
+        else:
+            self.values = np.asarray(dates)
+        self.unit = unit
+        self.scale = UNIT_NS[unit]
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df['Date'], df.attrs.get('date_unit', 'ns'))
+
+    def __len__(self):
+        return len(self.values)
+
+    def timestamp(self, i):
+        return pd.Timestamp(int(self.values[i]) * self.scale)
+
+    def locate(self, date):
+        # Posição exata da data, ou -1 se não existir
+        ns = to_ns(date)
+        if ns % self.scale:
+            return -1
+        key = ns // self.scale
+        i = int(np.searchsorted(self.values, key))
+        if i < len(self.values) and self.values[i] == key:
+            return i
+        return -1
+
+    def locate_many(self, dates):
+        ns = pd.DatetimeIndex(dates).as_unit('ns').asi8
+        keys = ns // self.scale
+        idx = np.searchsorted(self.values, keys)
+        found = (idx < len(self.values)) & (ns % self.scale == 0)
+        found[found] = self.values[idx[found]] == keys[found]
+        return np.where(found, idx, -1)
+
+    def at_or_before(self, date):
+        # Último candle com data <= date (-1 se a data é anterior a tudo)
+        key = to_ns(date) // self.scale
+        return int(np.searchsorted(self.values, key, side='right')) - 1
+
+    def at_or_after(self, date):
+        # Primeiro candle com data >= date (len se a data é posterior a tudo)
+        key = -(-to_ns(date) // self.scale)
+        return int(np.searchsorted(self.values, key, side='left'))
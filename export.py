@@ -0,0 +1,155 @@
+'''
+Export headless de um replay: um PNG por candle ou um vídeo, sem abrir o Tk.
+
+Exemplos:
+    python export.py PETR4.SA --inicio 2023-01-01 --fim 2024-01-01 --saida frames/
+    python export.py PETR4.SA --inicio 2020-01-01 --indicadores sma,bb,rsi \\
+        --trades trades.csv --saida replay.mp4 --fps 30
+
+Os frames são divididos em blocos contíguos entre processos (backend Agg),
+cada processo grava seus PNGs numerados e no fim os arquivos são juntados
+em ordem (.mp4 via ffmpeg, .gif via Pillow).
+
+O arquivo de trades é um CSV com entry_date, exit_date, entry_price e
+exit_price (mesmas chaves do trades_history do simulador).
+'''
+import os
+import shutil
+import argparse
+import subprocess
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import datastore
+import indicators
+import render
+from dateindex import DateIndex
+
+WINDOW = 50
+ALL_INDICATORS = ("sma", "ema", "bb", "rsi", "macd", "volume", "vwap", "profile")
+
+# Estado de cada processo (recebido uma vez no initializer, não por frame)
+_worker = {}
+
+
+def load_trades(path, df):
+    trades = pd.read_csv(path, parse_dates=['entry_date', 'exit_date'])
+    date_index = DateIndex.from_frame(df)
+    entry_bars = date_index.locate_many(trades['entry_date'])
+    exit_bars = date_index.locate_many(trades['exit_date'])
+    return list(zip(entry_bars, trades['entry_price'], exit_bars, trades['exit_price']))
+
+
+def _init_worker(df, show, title, trades, figsize, dpi):
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    _worker.update(df=df, show=show, title=title, trades=trades, fig=fig)
+
+
+def _render_range(first, last, frame_offset, out_dir):
+    df = _worker['df']
+    fig = _worker['fig']
+    trades = _worker['trades']
+
+    # Trades fechados até o frame e posição aberta (se houver) no frame
+    for end_idx in range(first, last):
+        start_idx = max(0, end_idx - WINDOW)
+        closed = [t for t in trades if t[2] < end_idx]
+        position = next(((t[0], t[1]) for t in trades if t[0] < end_idx <= t[2]), None)
+
+        render.draw_frame(fig, df, start_idx, end_idx, _worker['show'], _worker['title'],
+                          position=position, trades=closed)
+        fig.savefig(os.path.join(out_dir, f"frame_{frame_offset + end_idx - first:06d}.png"),
+                    facecolor=fig.get_facecolor(), pil_kwargs={'compress_level': 1})
+    return last - first
+
+
+def export_frames(df, out_dir, first, last, show, title, trades=(), workers=None,
+                  figsize=(12, 7), dpi=100):
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    # Blocos contíguos: cada processo monta (e ajusta) o layout uma vez só
+    bounds = np.linspace(first, last, workers + 1).astype(int)
+    chunks = [(int(a), int(b), int(a - first), out_dir) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    initargs = (df, show, title, list(trades), figsize, dpi)
+    if len(chunks) == 1:
+        _init_worker(*initargs)
+        return _render_range(*chunks[0])
+
+    with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init_worker, initargs=initargs) as pool:
+        return sum(pool.map(_render_range, *zip(*chunks)))
+
+
+def stitch(frames_dir, output, fps):
+    ext = os.path.splitext(output)[1].lower()
+    if ext == ".gif":
+        from PIL import Image
+
+        names = sorted(n for n in os.listdir(frames_dir) if n.startswith("frame_"))
+        images = [Image.open(os.path.join(frames_dir, n)) for n in names]
+        images[0].save(output, save_all=True, append_images=images[1:], duration=int(1000 / fps), loop=0)
+        return
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg não encontrado no PATH (necessário para exportar vídeo)")
+    subprocess.run([
+        ffmpeg, "-y", "-loglevel", "error", "-framerate", str(fps),
+        "-i", os.path.join(frames_dir, "frame_%06d.png"),
+        "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        # largura/altura pares exigidas pelo yuv420p
+        "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", output,
+    ], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta um replay para PNGs ou vídeo (headless)")
+    parser.add_argument("ticker")
+    parser.add_argument("--inicio", default=None)
+    parser.add_argument("--fim", default=None)
+    parser.add_argument("--indicadores", default="", help="ex.: sma,ema,bb,rsi,macd,volume,vwap,profile")
+    parser.add_argument("--trades", default=None, help="CSV com os trades a marcar")
+    parser.add_argument("--saida", default="frames", help="pasta (PNGs) ou arquivo .mp4/.gif")
+    parser.add_argument("--fps", type=int, default=20)
+    parser.add_argument("--processos", type=int, default=None)
+    args = parser.parse_args()
+
+    if datastore.has_symbol(args.ticker):
+        df = datastore.load(args.ticker, args.inicio, args.fim)
+    else:
+        df = datastore.download(args.ticker, args.inicio or "2005-01-01", args.fim)
+    if len(df) == 0:
+        raise SystemExit("Nenhum dado encontrado para esta ação/período")
+
+    for name, values in indicators.compute_all(df["Close"]).items():
+        df[name] = values
+
+    chosen = {name.strip() for name in args.indicadores.split(",") if name.strip()}
+    show = {name: name in chosen for name in ALL_INDICATORS}
+    trades = load_trades(args.trades, df) if args.trades else []
+
+    # Mesmo início do simulador: primeiro frame já com a janela cheia
+    first = min(WINDOW, len(df))
+    last = len(df) + 1
+
+    is_video = os.path.splitext(args.saida)[1].lower() in (".mp4", ".gif", ".mov", ".mkv")
+    frames_dir = tempfile.mkdtemp(prefix="replay_") if is_video else args.saida
+
+    try:
+        n = export_frames(df, frames_dir, first, last, show, args.ticker, trades, workers=args.processos)
+        if is_video:
+            stitch(frames_dir, args.saida, args.fps)
+        print(f"{n} frames exportados para {args.saida}")
+    finally:
+        if is_video:
+            shutil.rmtree(frames_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+'''
+Servidor local de replay para sessões em grupo (asyncio, só localhost).
+
+Um processo carrega a série uma vez e transmite os candles (e, se pedido,
+ticks sintéticos dentro de cada candle) no mesmo relógio para todos os
+clientes conectados. Qualquer cliente pode pausar, continuar, mudar a
+velocidade ou saltar (seek), e o novo estado vai para todos.
+
+Servidor:
+    python feedserver.py serve PETR4.SA --inicio 2020-01-01 --velocidade 2 --ticks 10
+
+Clientes:
+    python replaytrade.py --feed 8765                      (simulador segue o relógio do grupo)
+    python livefeed.py ingest PETR4.SA --feed 8765 --segundos 86400
+    python livefeed.py chart PETR4.SA                      (gráfico ao vivo do feed)
+    python feedserver.py ctl play|pause|seek N|speed X     (controle pelo terminal)
+
+Protocolo: uma mensagem JSON por linha.
+  servidor -> cliente:
+    {"type": "hello", "symbol", "total", "bar_seconds"}
+    {"type": "bars", "start": i, "rows": [[t, o, h, l, c, v], ...], "index": n}
+    {"type": "tick", "index": i, "t": epoch, "price": p}
+    {"type": "state", "index": n, "playing": bool, "speed": candles/s}
+  cliente -> servidor:
+    {"cmd": "play" | "pause" | "seek" | "speed", "index": n, "speed": x, "token": ...}
+
+Cada mensagem é codificada uma vez e a mesma sequência de bytes vai para
+todos. Cada cliente tem uma fila limitada: cliente lento perde primeiro os
+ticks e, se a fila encher, recebe de novo o estado completo (resync) em vez
+de travar o servidor ou os outros.
+'''
+import sys
+import json
+import socket
+import asyncio
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+import datastore
+
+HOST = "127.0.0.1"  # nunca escuta fora da máquina
+PORT = 8765
+QUEUE_MAX = 2000
+
+
+def encode(msg):
+    return json.dumps(msg, separators=(',', ':')).encode() + b"\n"
+
+
+def synth_ticks(o, h, l, c, n):
+    # n preços no caminho O -> L -> H -> C (candle de alta) ou O -> H -> L -> C
+    path = [o, l, h, c] if c >= o else [o, h, l, c]
+    return np.interp(np.linspace(0, 3, n + 2)[1:-1], [0, 1, 2, 3], path)
+
+
+class Subscriber:
+    def __init__(self, writer):
+        self.writer = writer
+        self.queue = asyncio.Queue(QUEUE_MAX)
+        self.resyncs = 0
+
+
+class ReplayFeedServer:
+    def __init__(self, df, symbol, speed=1.0, ticks_per_bar=0, start_index=50, token=None):
+        dates = pd.DatetimeIndex(df['Date'])
+        self.symbol = symbol
+        self.times = dates.as_unit('ns').asi8 / 1e9
+        self.rows_array = np.column_stack([self.times] + [df[c].to_numpy(dtype=float)
+                                                          for c in ('Open', 'High', 'Low', 'Close', 'Volume')])
+        self.total = len(df)
+        self.bar_seconds = float(np.median(np.diff(self.times))) if self.total > 1 else 86400.0
+
+        self.index = min(start_index, self.total)  # candles já revelados
+        self.high_water = self.index  # todos os clientes têm [0, high_water)
+        self.speed = speed
+        self.ticks_per_bar = ticks_per_bar
+        self.playing = False
+        self.token = token
+        self.generation = 0  # muda a cada comando: interrompe o candle em andamento
+        self.subscribers = set()
+        self.wake = None
+
+    # ===== Mensagens =====
+    def bars_msg(self, start, end):
+        return {"type": "bars", "start": start, "rows": self.rows_array[start:end].tolist(), "index": self.index}
+
+    def state_msg(self):
+        return {"type": "state", "index": self.index, "playing": self.playing, "speed": self.speed}
+
+    def snapshot(self):
+        return b"".join([
+            encode({"type": "hello", "symbol": self.symbol, "total": self.total, "bar_seconds": self.bar_seconds}),
+            encode(self.bars_msg(0, self.high_water)),
+            encode(self.state_msg()),
+        ])
+
+    def broadcast(self, data, droppable=False):
+        for sub in list(self.subscribers):
+            if droppable and sub.queue.qsize() > QUEUE_MAX // 2:
+                continue
+            try:
+                sub.queue.put_nowait(data)
+            except asyncio.QueueFull:
+                self.resync(sub)
+
+    def resync(self, sub):
+        # Cliente lento: descarta a fila e manda o estado completo de novo
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.resyncs += 1
+        sub.queue.put_nowait(self.snapshot())
+
+    # ===== Conexões =====
+    async def handle(self, reader, writer):
+        sub = Subscriber(writer)
+        self.subscribers.add(sub)
+        sub.queue.put_nowait(self.snapshot())
+        pump = asyncio.create_task(self.pump(sub))
+        try:
+            async for line in reader:
+                try:
+                    self.command(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    continue
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.discard(sub)
+            pump.cancel()
+            writer.close()
+
+    async def pump(self, sub):
+        try:
+            while True:
+                sub.writer.write(await sub.queue.get())
+                await sub.writer.drain()
+        except ConnectionError:
+            self.subscribers.discard(sub)
+
+    def command(self, msg):
+        if self.token is not None and msg.get("token") != self.token:
+            return
+        cmd = msg.get("cmd")
+        if cmd == "play":
+            self.playing = True
+        elif cmd == "pause":
+            self.playing = False
+        elif cmd == "seek":
+            self.seek(int(msg["index"]))
+        elif cmd == "speed":
+            self.speed = max(0.01, float(msg["speed"]))
+        else:
+            return
+        self.generation += 1
+        self.wake.set()
+        self.broadcast(encode(self.state_msg()))
+
+    def seek(self, index):
+        self.index = max(1, min(index, self.total))
+        if self.index > self.high_water:
+            # Candles pulados vão uma vez só, para todos
+            self.broadcast(encode(self.bars_msg(self.high_water, self.index)))
+            self.high_water = self.index
+
+    # ===== Relógio =====
+    async def sleep(self, seconds):
+        # Espera interrompível por comandos (pause/seek/speed)
+        self.wake.clear()
+        try:
+            await asyncio.wait_for(self.wake.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def clock(self):
+        while True:
+            if not self.playing or self.index >= self.total:
+                self.wake.clear()
+                await self.wake.wait()
+                continue
+
+            generation = self.generation
+            i = self.index
+            step = 1 / self.speed / (self.ticks_per_bar + 1)
+            t, o, h, l, c, v = self.rows_array[i]
+
+            prices = synth_ticks(o, h, l, c, self.ticks_per_bar) if self.ticks_per_bar else ()
+            for k, price in enumerate(prices, 1):
+                await self.sleep(step)
+                if self.generation != generation:
+                    break
+                tick_time = t + self.bar_seconds * k / (self.ticks_per_bar + 1)
+                self.broadcast(encode({"type": "tick", "index": i, "t": tick_time, "price": float(price)}),
+                               droppable=True)
+            else:
+                await self.sleep(step)
+
+            if self.generation != generation:
+                continue
+            self.index = i + 1
+            self.high_water = max(self.high_water, self.index)
+            self.broadcast(encode(self.bars_msg(i, i + 1)))
+
+    async def serve(self, port=PORT):
+        self.wake = asyncio.Event()
+        server = await asyncio.start_server(self.handle, HOST, port, limit=2**20)
+        print(f"Replay de {self.symbol} ({self.total} candles) em {HOST}:{port}")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.clock())
+
+
+# ===== Cliente (thread, para Tk/matplotlib) =====
+class FeedClient:
+    def __init__(self, port=PORT, on_message=None):
+        self.sock = socket.create_connection((HOST, port))
+        self.on_message = on_message
+        self.lock = threading.Lock()
+        self.symbol = None
+        self.bar_seconds = 86400.0
+        self.rows = np.empty((0, 6))
+        self.received = 0  # candles recebidos (a série pode estar à frente do index após seek)
+        self.index = 0
+        self.playing = False
+        self.speed = 1.0
+        self.last_tick = None
+        self.version = 0
+        self.connected = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            for line in self.sock.makefile('rb'):
+                msg = json.loads(line)
+                with self.lock:
+                    self._apply(msg)
+                    self.version += 1
+                if self.on_message:
+                    self.on_message(msg)
+        except (OSError, ValueError):
+            pass
+        self.connected = False
+
+    def _apply(self, msg):
+        kind = msg["type"]
+        if kind == "hello":
+            self.symbol = msg["symbol"]
+            self.bar_seconds = msg["bar_seconds"]
+            self.rows = np.full((msg["total"], 6), np.nan)
+            self.received = 0
+        elif kind == "bars":
+            start = msg["start"]
+            rows = msg["rows"]
+            if rows:
+                self.rows[start:start + len(rows)] = rows
+            self.received = max(self.received, start + len(rows))
+            self.index = msg["index"]
+        elif kind == "tick":
+            self.last_tick = (msg["t"], msg["price"])
+        elif kind == "state":
+            self.index = msg["index"]
+            self.playing = msg["playing"]
+            self.speed = msg["speed"]
+
+    def frame(self, start=0):
+        # Candles recebidos (a partir de start) no formato do simulador
+        with self.lock:
+            rows = self.rows[start:self.received].copy()
+        return pd.DataFrame({
+            'Date': pd.to_datetime(rows[:, 0], unit='s'),
+            'Open': rows[:, 1], 'High': rows[:, 2], 'Low': rows[:, 3], 'Close': rows[:, 4], 'Volume': rows[:, 5],
+        })
+
+    def send(self, cmd, **kwargs):
+        self.sock.sendall(encode({"cmd": cmd, **kwargs}))
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class FeedTicker(FeedClient):
+    # Mesmo formato do ticker do Tradingview-ticker (.states[symbol]), para o livefeed.py
+    def __init__(self, symbol, port=PORT):
+        self.states = {}
+        self.feed_symbol = symbol
+        super().__init__(port, on_message=self._on_message)
+
+    def _on_message(self, msg):
+        if msg["type"] == "tick":
+            self.states[self.feed_symbol] = {"price": msg["price"], "time": msg["t"]}
+        elif msg["type"] == "bars" and len(msg["rows"]) == 1:
+            # Fechamento do candle, ainda dentro do mesmo intervalo
+            t, o, h, l, c, v = msg["rows"][0]
+            self.states[self.feed_symbol] = {"price": c, "time": t + self.bar_seconds * 0.999}
+
+    def start(self):
+        pass  # a thread de leitura já começa conectada
+
+    def stop(self):
+        self.close()
+
+
+def follow(app, client, interval=100):
+    # Simulador seguindo o relógio do servidor: novos candles entram no fim, sem
+    # zerar os trades nem recalcular a série inteira; ticks não mexem no simulador
+    def poll():
+        if client.received:
+            if app.df is None:
+                app.ticker_entry.delete(0, "end")
+                app.ticker_entry.insert(0, client.symbol)
+                app.set_data(client.frame())
+            elif client.received > len(app.df):
+                app.append_bars(client.frame(start=len(app.df)))
+            elif client.received < len(app.df):
+                app.update_frame(client.frame())  # outra série no servidor
+            if client.index != app.current_index:
+                app.seek(client.index)
+        if client.connected:
+            app.root.after(interval, poll)
+        else:
+            app.status_bar.config(text="Feed desconectado")
+
+    poll()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de replay para sessões em grupo")
+    sub = parser.add_subparsers(dest="modo", required=True)
+
+    serve = sub.add_parser("serve")
+    serve.add_argument("ticker")
+    serve.add_argument("--inicio", default=None)
+    serve.add_argument("--fim", default=None)
+    serve.add_argument("--porta", type=int, default=PORT)
+    serve.add_argument("--velocidade", type=float, default=1.0, help="candles por segundo")
+    serve.add_argument("--ticks", type=int, default=0, help="ticks sintéticos por candle")
+    serve.add_argument("--token", default=None, help="exige este token nos comandos")
+
+    ctl = sub.add_parser("ctl")
+    ctl.add_argument("cmd", choices=["play", "pause", "seek", "speed"])
+    ctl.add_argument("valor", nargs="?")
+    ctl.add_argument("--porta", type=int, default=PORT)
+    ctl.add_argument("--token", default=None)
+
+    args = parser.parse_args()
+
+    if args.modo == "serve":
+        if datastore.has_symbol(args.ticker):
+            df = datastore.load(args.ticker, args.inicio, args.fim)
+        else:
+            df = datastore.download(args.ticker, args.inicio or "2005-01-01", args.fim)
+        if len(df) == 0:
+            raise SystemExit("Nenhum dado encontrado para esta ação/período")
+        server = ReplayFeedServer(df, args.ticker, args.velocidade, args.ticks, token=args.token)
+        try:
+            asyncio.run(server.serve(args.porta))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    extra = {"token": args.token} if args.token else {}
+    if args.cmd == "seek":
+        extra["index"] = int(args.valor)
+    elif args.cmd == "speed":
+        extra["speed"] = float(args.valor)
+    with socket.create_connection((HOST, args.porta)) as sock:
+        sock.sendall(encode({"cmd": args.cmd, **extra}))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+'''
+Cache LRU de frames já renderizados (bitmaps do Agg).
+
+O simulador guarda o bitmap de cada frame desenhado, com a chave do que
+define a imagem (candle atual, janela, indicadores, posição/ordens, ativo,
+tamanho da figura). Voltar/avançar para um frame em cache é só um blit do
+bitmap, sem passar pelo render. Nos intervalos, os próximos frames na
+direção do movimento são renderizados numa figura fora da tela.
+
+O limite é em bytes (cada frame custa largura x altura x 4); o cache é
+limpo quando os dados, os trades ou o tamanho da janela mudam. Vários
+simuladores na mesma janela (multipane.py) dividem um cache só, cada um com
+a sua partição: o limite é global e limpar um painel não apaga os outros.
+'''
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import render
+
+
+class FrameCache:
+    def __init__(self, max_bytes=200 * 2**20):
+        self.max_bytes = max_bytes
+        self.frames = OrderedDict()  # chave -> (BufferRegion, bytes)
+        self.nbytes = 0
+
+    def __contains__(self, key):
+        return key in self.frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get(self, key):
+        item = self.frames.get(key)
+        if item is None:
+            return None
+        self.frames.move_to_end(key)
+        return item[0]
+
+    def put(self, key, region):
+        x0, y0, x1, y1 = region.get_extents()
+        size = (x1 - x0) * (y1 - y0) * 4
+        if size > self.max_bytes:
+            return
+        if key in self.frames:
+            self.nbytes -= self.frames.pop(key)[1]
+        self.frames[key] = (region, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            self.nbytes -= self.frames.popitem(last=False)[1][1]
+
+    def discard(self, predicate):
+        # Tira só os frames cujas chaves satisfazem predicate(chave)
+        for key in [key for key in self.frames if predicate(key)]:
+            self.nbytes -= self.frames.pop(key)[1]
+
+    def clear(self):
+        self.frames.clear()
+        self.nbytes = 0
+
+    def partition(self):
+        return FramePartition(self)
+
+
+class FramePartition:
+    # Frames de um simulador num FrameCache compartilhado: chave (partição, chave do frame)
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __contains__(self, key):
+        return (self, key) in self.cache
+
+    def __len__(self):
+        return sum(1 for key in self.cache.frames if key[0] is self)
+
+    def get(self, key):
+        return self.cache.get((self, key))
+
+    def put(self, key, region):
+        self.cache.put((self, key), region)
+
+    def discard(self, predicate):
+        self.cache.discard(lambda key: key[0] is self and predicate(key[1]))
+
+    def clear(self):
+        self.cache.discard(lambda key: key[0] is self)
+
+
+def frame_key(index, show, position, orders, label, fig):
+    # Tudo que muda a imagem do frame (NaN vira None para a chave comparar igual)
+    if orders is not None:
+        orders = tuple(None if np.isnan(level) else float(level) for level in orders)
+    if position is not None:
+        position = (int(position[0]), float(position[1]))
+    w, h = fig.get_size_inches()
+    return (index, tuple(sorted(show.items())), position, orders, label,
+            round(float(w), 3), round(float(h), 3), fig.dpi)
+
+
+class OffscreenRenderer:
+    # Figura Agg fora da tela, com o mesmo tamanho/dpi da figura do simulador
+    def __init__(self):
+        self.fig = None
+        self.canvas = None
+
+    def render(self, like_fig, df, start_idx, end_idx, show, title, position=None, orders=None):
+        size = tuple(like_fig.get_size_inches())
+        if self.fig is None or tuple(self.fig.get_size_inches()) != size or self.fig.dpi != like_fig.dpi:
+            self.fig = Figure(figsize=size, dpi=like_fig.dpi, facecolor=like_fig.get_facecolor())
+            self.canvas = FigureCanvasAgg(self.fig)
+        render.draw_frame(self.fig, df, start_idx, end_idx, show, title, position=position, orders=orders)
+        self.canvas.draw()
+        return self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def invalidate(self):
+        if self.fig is not None:
+            render.invalidate_layouts(self.fig)
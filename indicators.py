@@ -0,0 +1,247 @@
+'''
+Fórmulas dos indicadores do simulador.
+
+Todas as fórmulas recebem uma Series (um ativo) ou um DataFrame (um ativo por
+coluna) e devolvem o mesmo formato, então a mesma conta serve para o gráfico
+e para o scanner.
+
+Registro de indicadores
+-----------------------
+Cada indicador registrado declara suas saídas, parâmetros (com padrão) e
+lookback, e descreve cada saída como um nó de cálculo:
+
+    nó = (função, arg1, arg2, ...)   com args sendo outros nós ou constantes
+
+Nós iguais são o mesmo cálculo, então o planejador (Plan) junta os
+indicadores pedidos num grafo só e calcula cada intermediário uma vez: a
+média móvel da SMA(20) e a do meio da Bollinger(20), a EMA(12) do MACD e uma
+EMA de span 12, o diff do RSI etc. O maior lookback do plano (warmup) marca
+os candles iniciais de aquecimento, em que o scanner e o "próximo sinal" não
+disparam (a EMA, por exemplo, tem valor desde o primeiro candle, mas ainda
+sem significado).
+
+Indicador próprio:
+
+    @indicators.register("momentum", ["MOM"], lookback=lambda p: p["period"], period=10)
+    def momentum(p):
+        return {"MOM": (lambda close, n: close - close.shift(n), indicators.CLOSE, p["period"])}
+
+    indicators.compute(df, [("momentum", {"period": 5})])
+'''
+import functools
+
+
+# ===== Nós de cálculo (intermediários compartilháveis) =====
+def _column(name):
+    raise AssertionError("coluna de entrada: resolvida pelo Plan")
+
+
+def _rolling_mean(values, n):
+    return values.rolling(n).mean()
+
+
+def _rolling_std(values, n):
+    return values.rolling(n).std()
+
+
+def _ewm(values, span):
+    return values.ewm(span=span, adjust=False).mean()
+
+
+def _diff(values):
+    return values.diff()
+
+
+def _gain(values):
+    return values.clip(lower=0)
+
+
+def _loss(values):
+    return -values.clip(upper=0)
+
+
+def _sub(a, b):
+    return a - b
+
+
+def _band(mid, width, k):
+    return mid + k * width
+
+
+def _rsi_from(avg_gain, avg_loss):
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def column(name):
+    return (_column, name)
+
+
+def mean(src, n):
+    return (_rolling_mean, src, n)
+
+
+def std(src, n):
+    return (_rolling_std, src, n)
+
+
+def ewm(src, span):
+    return (_ewm, src, span)
+
+
+def diff(src):
+    return (_diff, src)
+
+
+CLOSE = column("Close")
+
+
+def _is_node(value):
+    return isinstance(value, tuple) and len(value) > 0 and callable(value[0])
+
+
+# ===== Registro =====
+class Indicator:
+    def __init__(self, name, outputs, build, lookback, defaults):
+        self.name = name
+        self.outputs = list(outputs)
+        self.build = build  # params -> {saída: nó}
+        self.lookback = lookback  # params -> candles até o primeiro valor válido
+        self.defaults = defaults
+
+    def params(self, overrides=None):
+        params = dict(self.defaults)
+        params.update(overrides or {})
+        return params
+
+
+REGISTRY = {}
+
+
+def register(name, outputs, lookback, **defaults):
+    def decorator(build):
+        REGISTRY[name] = Indicator(name, outputs, build, lookback, defaults)
+        return build
+    return decorator
+
+
+@register("sma", ["SMA"], lookback=lambda p: p["period"], period=20)
+def _sma_nodes(p):
+    return {"SMA": mean(CLOSE, p["period"])}
+
+
+@register("ema", ["EMA"], lookback=lambda p: p["span"], span=9)
+def _ema_nodes(p):
+    return {"EMA": ewm(CLOSE, p["span"])}
+
+
+@register("bb", ["BB_UP", "BB_DN"], lookback=lambda p: p["period"], period=20, n_std=2)
+def _bb_nodes(p):
+    mid = mean(CLOSE, p["period"])
+    width = std(CLOSE, p["period"])
+    return {"BB_UP": (_band, mid, width, p["n_std"]), "BB_DN": (_band, mid, width, -p["n_std"])}
+
+
+@register("rsi", ["RSI"], lookback=lambda p: p["period"] + 1, period=14)
+def _rsi_nodes(p):
+    delta = diff(CLOSE)
+    return {"RSI": (_rsi_from, mean((_gain, delta), p["period"]), mean((_loss, delta), p["period"]))}
+
+
+@register("macd", ["MACD", "MACD_SIGNAL"], lookback=lambda p: p["slow"] + p["signal"],
+          fast=12, slow=26, signal=9)
+def _macd_nodes(p):
+    line = (_sub, ewm(CLOSE, p["fast"]), ewm(CLOSE, p["slow"]))
+    return {"MACD": line, "MACD_SIGNAL": ewm(line, p["signal"])}
+
+
+# ===== Planejador =====
+class Plan:
+    # requests: [(nome no registro, {parâmetros}), ...]
+    def __init__(self, requests):
+        self.outputs = {}
+        self.lookback = 0
+        for name, overrides in requests:
+            indicator = REGISTRY[name]
+            params = indicator.params(overrides)
+            for output, node in indicator.build(params).items():
+                # Mesmo nome com outro cálculo (sma 20 e sma 50) sumiria sem aviso
+                if self.outputs.get(output, node) != node:
+                    raise ValueError(f"Saída {output!r} pedida duas vezes com cálculos diferentes "
+                                     f"({name} {params})")
+                self.outputs[output] = node
+            self.lookback = max(self.lookback, indicator.lookback(params))
+
+        # Ordem topológica dos nós únicos (dependências antes de quem usa)
+        self.order = []
+        seen = set()
+
+        def visit(node):
+            if node in seen:
+                return
+            seen.add(node)
+            for arg in node[1:]:
+                if _is_node(arg):
+                    visit(arg)
+            self.order.append(node)
+
+        for node in self.outputs.values():
+            visit(node)
+
+        self.inputs = [node[1] for node in self.order if node[0] is _column]
+
+    def run(self, columns):
+        # columns: {"Close": Series/DataFrame, ...}; cada nó é calculado uma vez
+        missing = [name for name in self.inputs if name not in columns]
+        if missing:
+            raise KeyError(f"Colunas necessárias para os indicadores: {', '.join(missing)}")
+
+        values = {}
+        for node in self.order:
+            func, *args = node
+            if func is _column:
+                values[node] = columns[args[0]]
+            else:
+                values[node] = func(*(values[a] if _is_node(a) else a for a in args))
+        return {name: values[node] for name, node in self.outputs.items()}
+
+
+@functools.lru_cache(maxsize=64)
+def _plan(key):
+    return Plan([(name, dict(params)) for name, params in key])
+
+
+def plan_key(requests):
+    # Pedidos em forma hashável (chave do cache de planos e de quem guarda frames calculados)
+    return tuple((name, tuple(sorted((overrides or {}).items()))) for name, overrides in requests)
+
+
+def plan_for(requests):
+    # Plano reaproveitado para a mesma lista de pedidos (cache limitado: períodos vêm do usuário)
+    return _plan(plan_key(requests))
+
+
+def compute(columns, requests):
+    # columns: DataFrame do ativo ou dict de colunas
+    return plan_for(requests).run(columns)
+
+
+def default_requests(sma_period=20, ema_period=9, bb_period=20, bb_std=2, rsi_period=14):
+    return [
+        ("sma", {"period": sma_period}),
+        ("ema", {"span": ema_period}),
+        ("bb", {"period": bb_period, "n_std": bb_std}),
+        ("rsi", {"period": rsi_period}),
+        ("macd", {}),
+    ]
+
+
+def warmup(sma_period=20, ema_period=9, bb_period=20, bb_std=2, rsi_period=14, extra=()):
+    # Candles iniciais sem valor confiável em algum indicador (maior lookback do plano)
+    requests = default_requests(sma_period, ema_period, bb_period, bb_std, rsi_period) + list(extra)
+    return plan_for(requests).lookback
+
+
+def compute_all(close, sma_period=20, ema_period=9, bb_period=20, bb_std=2, rsi_period=14, extra=()):
+    # Mesmas colunas que o simulador grava no self.df (+ indicadores extras registrados)
+    requests = default_requests(sma_period, ema_period, bb_period, bb_std, rsi_period) + list(extra)
+    return compute({"Close": close}, requests)
@@ -0,0 +1,313 @@
+'''
+Feed ao vivo em memória compartilhada: um processo de ingestão, N gráficos.
+
+O processo "ingest" conecta no ticker (ou num feed falso local), agrega os
+ticks em candles e publica num ring buffer em memória compartilhada com um
+contador de sequência (seqlock). Qualquer número de gráficos/simuladores
+anexa o mesmo buffer só para leitura, sem lock e sem segunda conexão.
+
+Uso:
+    python livefeed.py ingest BINANCE:BTCUSDT --segundos 15
+    python livefeed.py chart BINANCE:BTCUSDT          (em outro terminal, quantos quiser)
+
+    python livefeed.py demo --fake                    (ingest falso + 2 gráficos)
+    python livefeed.py ingest PETR4.SA --feed 8765 --segundos 86400   (ticks do feedserver.py)
+
+O ticker real é o do Tradingview-ticker (ver teste.py); com --fake usa um
+passeio aleatório local, útil para testar sem rede.
+'''
+import re
+import sys
+import time
+import random
+import signal
+import argparse
+import threading
+import subprocess
+import numpy as np
+from datetime import datetime
+from multiprocessing import shared_memory, resource_tracker
+
+CANDLE_DTYPE = np.dtype([
+    ('time', 'f8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+])
+
+# Cabeçalho: [seq, count, capacity, candle_seconds] em int64
+HEADER_FIELDS = 4
+HEADER_BYTES = HEADER_FIELDS * 8
+SEQ, COUNT, CAPACITY, SECONDS = range(HEADER_FIELDS)
+
+
+def shm_name(symbol):
+    return "replaytrade_" + re.sub(r'\W', '_', symbol)
+
+
+class CandleRing:
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        capacity = int(self.header[CAPACITY])
+        self.candles = np.ndarray((capacity,), dtype=CANDLE_DTYPE, buffer=shm.buf, offset=HEADER_BYTES)
+        if not owner:
+            self.header.flags.writeable = False
+            self.candles.flags.writeable = False
+
+    @classmethod
+    def create(cls, symbol, capacity=4096, candle_seconds=15):
+        size = HEADER_BYTES + capacity * CANDLE_DTYPE.itemsize
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name(symbol), create=True, size=size)
+        except FileExistsError:
+            # Segmento de um ingest que caiu sem unlink: descarta e cria de novo
+            stale = shared_memory.SharedMemory(name=shm_name(symbol))
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=shm_name(symbol), create=True, size=size)
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = (0, 0, capacity, candle_seconds)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, symbol):
+        name = shm_name(symbol)
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: o resource_tracker apagaria o segmento quando o leitor sai
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def candle_seconds(self):
+        return int(self.header[SECONDS])
+
+    @property
+    def seq(self):
+        return int(self.header[SEQ])
+
+    # ===== Escrita (só o processo de ingestão) =====
+    def _begin(self):
+        self.header[SEQ] += 1  # ímpar = escrita em andamento
+
+    def _end(self):
+        self.header[SEQ] += 1
+
+    def push(self, candle):
+        self._begin()
+        count = int(self.header[COUNT])
+        self.candles[count % len(self.candles)] = candle
+        self.header[COUNT] = count + 1
+        self._end()
+
+    def update_last(self, candle):
+        self._begin()
+        count = int(self.header[COUNT])
+        self.candles[(count - 1) % len(self.candles)] = candle
+        self._end()
+
+    # ===== Leitura (qualquer processo) =====
+    def latest(self, n):
+        # Cópia consistente dos últimos n candles (tenta de novo se pegou escrita no meio)
+        capacity = len(self.candles)
+        while True:
+            seq = int(self.header[SEQ])
+            if seq % 2:
+                time.sleep(0)
+                continue
+            count = int(self.header[COUNT])
+            n_read = min(n, count, capacity)
+            idx = np.arange(count - n_read, count) % capacity
+            out = self.candles[idx]
+            if int(self.header[SEQ]) == seq:
+                return seq, out
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class CandleAggregator:
+    # Mesma lógica do loop do teste.py/teste2.py, publicando no ring
+    def __init__(self, ring):
+        self.ring = ring
+        self.current = None
+
+    def on_tick(self, price, ts):
+        seconds = self.ring.candle_seconds
+        candle_time = int(ts) - (int(ts) % seconds)
+
+        if self.current is None or candle_time != self.current['time']:
+            self.current = np.array((candle_time, price, price, price, price), dtype=CANDLE_DTYPE)
+            self.ring.push(self.current)
+            return True
+
+        if price == self.current['close'] and self.current['low'] <= price <= self.current['high']:
+            return False
+        self.current['high'] = max(self.current['high'], price)
+        self.current['low'] = min(self.current['low'], price)
+        self.current['close'] = price
+        self.ring.update_last(self.current)
+        return True
+
+
+class FakeTicker(threading.Thread):
+    # Mesmo formato do ticker do Tradingview-ticker: .states[symbol] = {"price", "time"}
+    def __init__(self, symbol, price=100.0, interval=0.05):
+        super().__init__(daemon=True)
+        self.symbol = symbol
+        self.price = price
+        self.interval = interval
+        self.states = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.price = max(0.01, self.price * (1 + random.gauss(0, 0.0005)))
+            self.states[self.symbol] = {"price": round(self.price, 2), "time": time.time()}
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def _stop_on_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run_ingest(symbol, candle_seconds=15, fake=False, capacity=4096, feed=None):
+    # terminate() do demo/supervisor também precisa liberar a memória compartilhada
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+
+    if feed is not None:
+        from feedserver import FeedTicker
+        tick = FeedTicker(symbol, feed)
+    elif fake:
+        tick = FakeTicker(symbol)
+    else:
+        from ticker import ticker
+        tick = ticker(symbol)
+    tick.start()
+
+    ring = CandleRing.create(symbol, capacity=capacity, candle_seconds=candle_seconds)
+    aggregator = CandleAggregator(ring)
+    print(f"Publicando {symbol} em memória compartilhada ({shm_name(symbol)}), candles de {candle_seconds}s")
+
+    last_time = None
+    try:
+        while True:
+            state = tick.states.get(symbol)
+            if not state or state.get("price", 0) == 0:
+                time.sleep(0.05)
+                continue
+
+            # Só processa quando chega tick novo
+            ts = state.get("time", time.time())
+            if ts != last_time:
+                aggregator.on_tick(state["price"], ts)
+                last_time = ts
+            time.sleep(0.01)
+
+    except KeyboardInterrupt:
+        print("\nEncerrando...")
+
+    finally:
+        try:
+            tick.stop()
+        except Exception:
+            pass
+        ring.close()
+
+
+def run_chart(symbol, max_candles=40):
+    import matplotlib.pyplot as plt
+    from render import bars
+
+    # Espera o ingest criar o buffer
+    while True:
+        try:
+            ring = CandleRing.attach(symbol)
+            break
+        except FileNotFoundError:
+            time.sleep(0.2)
+
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(15, 7))
+    plt.ion()
+    plt.show(block=False)
+
+    last_seq = -1
+    try:
+        while plt.fignum_exists(fig.number):
+            if ring.seq == last_seq:
+                plt.pause(0.1)
+                continue
+
+            last_seq, visible = ring.latest(max_candles)
+            if len(visible) == 0:
+                plt.pause(0.1)
+                continue
+
+            ax.clear()
+            x = np.arange(len(visible))
+            colors = np.where(visible['close'] >= visible['open'], 'lime', 'red')
+            body_low = np.minimum(visible['open'], visible['close'])
+            body = np.maximum(np.abs(visible['close'] - visible['open']), 0.002)
+            bars(ax, x, body_low, body, 0.6, facecolors=colors, edgecolors=colors)
+            ax.vlines(x, visible['low'], visible['high'], colors=colors, linewidth=1.5)
+
+            ax.set_xlim(-0.5, max_candles - 0.5)
+            price_range = visible['high'].max() - visible['low'].min()
+            padding = price_range * 0.02 if price_range > 0 else 0.01
+            ax.set_ylim(visible['low'].min() - padding, visible['high'].max() + padding)
+
+            time_format = '%d/%m/%Y' if ring.candle_seconds >= 86400 else '%H:%M:%S'
+            labels = [datetime.fromtimestamp(t).strftime(time_format) for t in visible['time']]
+            step = max(1, len(visible) // 8)
+            ax.set_xticks(x[::step])
+            ax.set_xticklabels(labels[::step], rotation=45, ha='right', fontsize=8)
+
+            current = visible[-1]
+            direction = "UP" if current['close'] >= current['open'] else "DOWN"
+            ax.set_title(f"{symbol} | {direction} {current['close']:.2f} | seq {last_seq}",
+                         fontsize=12, fontweight='bold')
+            ax.grid(alpha=0.2)
+            fig.canvas.draw_idle()
+            plt.pause(0.3)
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        ring.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feed ao vivo em memória compartilhada")
+    parser.add_argument("modo", choices=["ingest", "chart", "demo"])
+    parser.add_argument("symbol", nargs="?", default="BINANCE:BTCUSDT")
+    parser.add_argument("--segundos", type=int, default=15)
+    parser.add_argument("--fake", action="store_true", help="usa feed falso local (sem rede)")
+    parser.add_argument("--graficos", type=int, default=2)
+    parser.add_argument("--feed", type=int, default=None, metavar="PORTA",
+                        help="recebe ticks do servidor de replay (feedserver.py) nesta porta")
+    args = parser.parse_args()
+
+    if args.modo == "ingest":
+        run_ingest(args.symbol, args.segundos, args.fake, feed=args.feed)
+    elif args.modo == "chart":
+        run_chart(args.symbol)
+    else:
+        charts = [subprocess.Popen([sys.executable, __file__, "chart", args.symbol])
+                  for _ in range(args.graficos)]
+        try:
+            run_ingest(args.symbol, args.segundos, args.fake, feed=args.feed)
+        finally:
+            for p in charts:
+                p.terminate()
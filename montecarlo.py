@@ -0,0 +1,116 @@
+'''
+Análise de robustez (Monte Carlo) dos trades de uma sessão ou backtest.
+
+Dois modos:
+    shuffle   - embaralha a ordem dos trades (mesmo resultado final, muda o drawdown)
+    bootstrap - reamostra os trades com reposição (muda resultado e drawdown)
+
+Cada lote é uma matriz caminhos x trades processada de uma vez no numpy,
+com o número de caminhos por lote limitado por max_cells (caminhos x trades),
+então a memória por processo não cresce com o tamanho da lista de trades;
+os lotes são divididos entre processos. Saída: distribuição do capital final,
+do drawdown máximo e a probabilidade de ruína.
+
+O retorno de cada trade sobre o capital é profit_pct x allocation (fração do
+patrimônio usada na entrada; 1 no simulador de um ativo, ~1/n nos trades da
+carteira). Trades simultâneos da carteira são tratados como sequenciais, o
+que é uma aproximação.
+'''
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+
+def trade_returns(trades):
+    # Aceita o trades_history (lista de dicts) ou um array de retornos em % sobre o capital
+    if len(trades) and isinstance(trades[0], dict):
+        pct = np.array([t['profit_pct'] * t.get('allocation', 1.0) for t in trades], dtype=float)
+    else:
+        pct = np.asarray(trades, dtype=float)
+    return pct / 100.0
+
+
+def _simulate_batch(returns, n_paths, seed, mode, initial_capital, ruin_fraction):
+    rng = np.random.default_rng(seed)
+    n = len(returns)
+
+    if mode == 'shuffle':
+        idx = rng.permuted(np.broadcast_to(np.arange(n), (n_paths, n)), axis=1)
+    else:
+        idx = rng.integers(0, n, size=(n_paths, n))
+
+    equity = initial_capital * np.cumprod(1.0 + returns[idx], axis=1)
+
+    # Pico inclui o capital inicial (drawdown já no primeiro trade conta)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), initial_capital)
+    max_dd = (1.0 - equity / peak).max(axis=1) * 100
+    ruined = equity.min(axis=1) <= initial_capital * (1.0 - ruin_fraction)
+
+    # Cópia: uma view da última coluna manteria a matriz inteira do lote viva
+    return equity[:, -1].copy(), max_dd, ruined
+
+
+def run(trades, n_resamples=100_000, mode='bootstrap', initial_capital=10000.0,
+        ruin_fraction=0.5, max_cells=2_000_000, workers=None, seed=None):
+    returns = trade_returns(trades)
+    if len(returns) == 0:
+        raise ValueError("Nenhum trade para analisar")
+
+    # Caminhos por lote: cada matriz do lote (índices, capital, pico) tem max_cells valores
+    batch_size = max(1, min(n_resamples, max_cells // len(returns)))
+
+    # Lotes com sementes independentes (resultado reprodutível com a mesma seed)
+    sizes = [batch_size] * (n_resamples // batch_size)
+    if n_resamples % batch_size:
+        sizes.append(n_resamples % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(returns, size, s, mode, initial_capital, ruin_fraction) for size, s in zip(sizes, seeds)]
+
+    if len(args) == 1 or workers == 1:
+        parts = [_simulate_batch(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_batch, *zip(*args)))
+
+    return {
+        'final_capital': np.concatenate([p[0] for p in parts]),
+        'max_drawdown': np.concatenate([p[1] for p in parts]),
+        'ruined': np.concatenate([p[2] for p in parts]),
+    }
+
+
+def summarize(result, initial_capital=10000.0):
+    final = result['final_capital']
+    dd = result['max_drawdown']
+    p5, p50, p95 = np.percentile(final, [5, 50, 95])
+    dd50, dd95, dd99 = np.percentile(dd, [50, 95, 99])
+    return {
+        'resamples': len(final),
+        'final_p5': p5,
+        'final_p50': p50,
+        'final_p95': p95,
+        'prob_loss': float((final < initial_capital).mean() * 100),
+        'dd_p50': dd50,
+        'dd_p95': dd95,
+        'dd_p99': dd99,
+        'prob_ruin': float(result['ruined'].mean() * 100),
+    }
+
+
+def format_summary(title, s):
+    return (
+        f"{title} ({s['resamples']:,} simulações)\n"
+        f"  Capital final  p5: R$ {s['final_p5']:,.2f}  "
+        f"p50: R$ {s['final_p50']:,.2f}  p95: R$ {s['final_p95']:,.2f}\n"
+        f"  Prob. prejuízo: {s['prob_loss']:.1f}%\n"
+        f"  Drawdown máx.  p50: {s['dd_p50']:.1f}%  p95: {s['dd_p95']:.1f}%  p99: {s['dd_p99']:.1f}%\n"
+        f"  Prob. ruína: {s['prob_ruin']:.2f}%"
+    )
+
+
+def analyze(trades, n_resamples=100_000, initial_capital=10000.0, ruin_fraction=0.5, workers=None, seed=None):
+    # Os dois modos, já formatados para exibir
+    texts = []
+    for mode, title in (('shuffle', "Ordem embaralhada"), ('bootstrap', "Bootstrap")):
+        result = run(trades, n_resamples, mode, initial_capital, ruin_fraction, workers=workers, seed=seed)
+        texts.append(format_summary(title, summarize(result, initial_capital)))
+    return "\n\n".join(texts)
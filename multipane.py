@@ -0,0 +1,297 @@
+'''
+Vários simuladores lado a lado numa janela só (um processo).
+
+Cada painel é um SwingTradeSimulator completo (gráfico, trades, stats),
+com ativo e tempo gráfico próprios. O que é igual entre eles é dividido:
+
+  - DataCache: dados baixados e DataFrames com indicadores, com contagem de
+    referências. Dois painéis no mesmo ativo/tempo gráfico usam o mesmo
+    DataFrame; diário e semanal do mesmo ativo dividem o download.
+  - RenderScheduler: painéis pedem redesenho e um único after_idle desenha
+    todos os pendentes, uma vez cada, por ciclo.
+  - FrameCache: um limite de memória para os bitmaps de todos os painéis,
+    cada painel na sua partição.
+
+Os atalhos (1-8, +/-) valem para o painel ativo (último clicado) e o botão
+"▶ Todos" avança todos os painéis juntos no mesmo tick.
+
+Uso:
+    python multipane.py PETR4.SA VALE3.SA
+'''
+import sys
+import pandas as pd
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+import datastore
+import framecache
+import indicators
+from replaytrade import SwingTradeSimulator
+
+# Tempo gráfico -> regra do resample do pandas (None = dados como baixados)
+TIMEFRAMES = {"Diário": None, "Semanal": "W-FRI", "Mensal": "ME"}
+
+
+def resample(df, rule):
+    if rule is None:
+        return df.copy()
+    out = df.set_index('Date').resample(rule).agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    )
+    return out.dropna(subset=['Close']).reset_index()
+
+
+class DataCache:
+    # Valores compartilhados com contagem de referências; sai da memória no último release
+    def __init__(self):
+        self.entries = {}  # chave -> [refs, valor, função chamada ao liberar]
+
+    def acquire(self, key, build):
+        entry = self.entries.get(key)
+        if entry is None:
+            value, on_release = build()
+            entry = self.entries[key] = [0, value, on_release]
+        entry[0] += 1
+        return entry[1]
+
+    def release(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry[0] -= 1
+        if entry[0] == 0:
+            del self.entries[key]
+            if entry[2]:
+                entry[2]()
+
+    def raw(self, symbol, start):
+        # Download (ou base local) do ativo, dividido entre tempos gráficos
+        key = ('raw', symbol, start)
+
+        def build():
+            if datastore.has_symbol(symbol):
+                df = datastore.load(symbol, start)
+            else:
+                df = datastore.download(symbol, start)
+            return df, None
+
+        return key, self.acquire(key, build)
+
+    def frame(self, pane, symbol, start, timeframe):
+        # DataFrame pronto (indicadores + compacto) para os parâmetros do painel
+        key = ('frame', symbol, start, timeframe, pane.compact, pane.sma_period, pane.ema_period,
+               pane.bb_period, pane.bb_std, pane.rsi_period, indicators.plan_key(pane.extra_indicators))
+
+        def build():
+            raw_key, raw = self.raw(symbol, start)
+            if len(raw) == 0:
+                self.release(raw_key)
+                raise ValueError("Nenhum dado encontrado para esta ação/período")
+            df = resample(raw, TIMEFRAMES[timeframe])
+            values = indicators.compute_all(
+                df["Close"], sma_period=pane.sma_period, ema_period=pane.ema_period,
+                bb_period=pane.bb_period, bb_std=pane.bb_std, rsi_period=pane.rsi_period,
+                extra=pane.extra_indicators,
+            )
+            for name, column in values.items():
+                df[name] = column
+            if pane.compact:
+                df = datastore.compact(df)
+            return df, lambda: self.release(raw_key)
+
+        return key, self.acquire(key, build)
+
+
+class RenderScheduler:
+    # Junta os pedidos de redesenho de todos os painéis num único after_idle
+    def __init__(self, root):
+        self.root = root
+        self.dirty = []
+        self.pending = None
+
+    def request(self, pane):
+        if pane not in self.dirty:
+            self.dirty.append(pane)
+        if self.pending is None:
+            self.pending = self.root.after_idle(self.flush)
+
+    def flush(self):
+        self.pending = None
+        dirty, self.dirty = self.dirty, []
+        for pane in dirty:
+            pane.draw_now()
+
+
+class SimulatorPane(SwingTradeSimulator):
+    def __init__(self, app, container, symbol):
+        self.app = app
+        self.data_key = None
+        self.initial_symbol = symbol
+        super().__init__(app.root, container, frame_cache=app.frame_cache.partition())
+
+    def setup_ui(self):
+        super().setup_ui()
+        self.ticker_entry.delete(0, tk.END)
+        self.ticker_entry.insert(0, self.initial_symbol)
+
+        self.timeframe_box = ttk.Combobox(self.control_frame, state='readonly', width=8,
+                                          values=list(TIMEFRAMES))
+        self.timeframe_box.set("Diário")
+        self.timeframe_box.pack(side=tk.LEFT, padx=5)
+        self.timeframe_box.bind("<<ComboboxSelected>>", lambda e: self.load_data())
+
+        tk.Button(self.control_frame, text="✕", command=lambda: self.app.remove_pane(self),
+                  bg='#4a4a4a', fg='white', font=('Arial', 10)).pack(side=tk.RIGHT, padx=5)
+
+        # Clique no gráfico torna o painel ativo (recebe os atalhos)
+        self.canvas.get_tk_widget().bind("<Button-1>", lambda e: self.app.activate(self), add="+")
+
+    def load_data(self):
+        symbol = self.ticker_entry.get().strip()
+        start = self.date_entry.get().strip()
+        timeframe = self.timeframe_box.get()
+
+        try:
+            self.status_bar.config(text=f"Carregando dados de {symbol}...")
+            self.root.update()
+            key, df = self.app.cache.frame(self, symbol, start, timeframe)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao carregar dados: {str(e)}")
+            self.status_bar.config(text="Erro ao carregar dados")
+            return False
+
+        self.release_data()
+        self.data_key = key
+        return self.set_data(df)
+
+    def open_hit(self, symbol, date):
+        # Sinal do scanner pelo DataCache (indicadores prontos, dados divididos com os outros painéis)
+        date = pd.Timestamp(date)
+        start = self.date_entry.get().strip()
+        if start and date < pd.Timestamp(start):
+            self.date_entry.delete(0, tk.END)
+            self.date_entry.insert(0, (date - pd.DateOffset(years=1)).strftime('%Y-%m-%d'))
+        self.ticker_entry.delete(0, tk.END)
+        self.ticker_entry.insert(0, symbol)
+        if not self.load_data():
+            return
+
+        self.seek(self.date_index.at_or_before(date) + 1)
+        self.update_stats()
+        self.status_bar.config(text=f"{symbol}: sinal em {date.strftime('%d/%m/%Y')}")
+
+    def prepare_frame(self, df):
+        # Do DataCache já vem pronto (compartilhado entre painéis, não alterar)
+        if self.data_key is not None and self.app.cache.entries[self.data_key][1] is df:
+            return df
+        return super().prepare_frame(df)
+
+    def release_data(self):
+        if self.data_key is not None:
+            self.app.cache.release(self.data_key)
+            self.data_key = None
+
+    def chart_label(self):
+        return f"{self.ticker_entry.get()} ({self.timeframe_box.get()})"
+
+    def plot_candles(self, use_cache=True):
+        if use_cache:
+            self.app.scheduler.request(self)
+        else:
+            super().plot_candles(use_cache=False)  # tooltip precisa dos artistas já
+
+    def draw_now(self):
+        super().plot_candles()
+
+
+class MultiPaneApp:
+    def __init__(self, root, symbols=("PETR4.SA", "VALE3.SA")):
+        self.root = root
+        self.root.title("Simulador de Swing Trade - Painéis")
+        self.root.geometry("1800x900")
+
+        self.cache = DataCache()
+        self.frame_cache = framecache.FrameCache()
+        self.scheduler = RenderScheduler(root)
+        self.panes = []
+        self.active = None
+        self.is_playing = False
+        self.play_id = None
+
+        toolbar = tk.Frame(root, bg='#1e1e1e', pady=4)
+        toolbar.pack(side=tk.TOP, fill=tk.X)
+        tk.Button(toolbar, text="+ Painel", command=lambda: self.add_pane("PETR4.SA"),
+                  bg='#4a4a4a', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
+        self.btn_play = tk.Button(toolbar, text="▶ Todos", command=self.toggle_play,
+                                  bg='#4a4a4a', fg='white', font=('Arial', 10), width=8)
+        self.btn_play.pack(side=tk.LEFT, padx=5)
+        self.speed_scale = tk.Scale(toolbar, from_=10, to=2000, orient=tk.HORIZONTAL, showvalue=False,
+                                    bg='#4a4a4a', troughcolor='#666666', length=150)
+        self.speed_scale.set(500)
+        self.speed_scale.pack(side=tk.LEFT, padx=5)
+
+        self.paned = ttk.PanedWindow(root, orient=tk.HORIZONTAL)
+        self.paned.pack(fill=tk.BOTH, expand=True)
+
+        for name, func in (("1", "sma"), ("2", "ema"), ("3", "bb"), ("4", "rsi"), ("5", "macd"), ("6", "volume"),
+                           ("7", "vwap"), ("8", "profile")):
+            root.bind(name, lambda e, func=func: self.active and self.active.toggle_indicator(func))
+        root.bind("+", lambda e: self.active and self.active.zoom_in())
+        root.bind("-", lambda e: self.active and self.active.zoom_out())
+
+        for symbol in symbols:
+            self.add_pane(symbol)
+
+    def add_pane(self, symbol):
+        frame = tk.Frame(self.paned, highlightthickness=2, highlightbackground='#2b2b2b')
+        self.paned.add(frame, weight=1)
+        pane = SimulatorPane(self, frame, symbol)
+        pane.frame = frame
+        self.panes.append(pane)
+        self.activate(pane)
+        return pane
+
+    def remove_pane(self, pane):
+        pane.is_playing = False
+        for after_id in (pane.animation_id, pane.prefetch_id, pane.scrub_id):
+            if after_id:
+                self.root.after_cancel(after_id)
+        pane.release_data()
+        pane.frame_cache.clear()
+        if pane in self.scheduler.dirty:
+            self.scheduler.dirty.remove(pane)
+        self.panes.remove(pane)
+        self.paned.forget(pane.frame)
+        pane.frame.destroy()
+        if self.active is pane:
+            self.activate(self.panes[-1] if self.panes else None)
+
+    def activate(self, pane):
+        self.active = pane
+        for other in self.panes:
+            other.frame.config(highlightbackground='#00aa00' if other is pane else '#2b2b2b')
+
+    def toggle_play(self):
+        self.is_playing = not self.is_playing
+        self.btn_play.config(text="⏸ Todos" if self.is_playing else "▶ Todos")
+        if self.is_playing:
+            self.tick()
+        elif self.play_id:
+            self.root.after_cancel(self.play_id)
+
+    def tick(self):
+        # Um passo em todos os painéis; o redesenho sai junto no próximo idle
+        loaded = [p for p in self.panes if p.df is not None and p.current_index < len(p.df)]
+        if not self.is_playing or not loaded:
+            self.is_playing = False
+            self.btn_play.config(text="▶ Todos")
+            return
+        for pane in loaded:
+            pane.forward()
+        self.play_id = self.root.after(self.speed_scale.get(), self.tick)
+
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = MultiPaneApp(root, sys.argv[1:] or ("PETR4.SA", "VALE3.SA"))
+    root.mainloop()
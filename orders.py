@@ -0,0 +1,50 @@
+'''
+Ordens de proteção (stop e alvo) da posição comprada.
+
+Modelo de execução, candle a candle contra Máxima/Mínima:
+  - stop: dispara se Mínima <= stop; executa no stop, ou na abertura se o
+    candle já abriu abaixo dele (gap);
+  - alvo: dispara se Máxima >= alvo; executa no alvo, ou na abertura se o
+    candle já abriu acima dele;
+  - stop e alvo no mesmo candle: assume o stop (a ordem intrabar é desconhecida).
+
+Níveis ausentes são NaN, então as mesmas comparações servem para um ativo
+(escalares) e para a carteira (um nível por coluna).
+'''
+import numpy as np
+
+
+def levels(entry_price, stop_pct, target_pct):
+    # Percentuais em relação à entrada; None/vazio = sem ordem
+    stop = entry_price * (1 - stop_pct / 100) if stop_pct else np.nan
+    target = entry_price * (1 + target_pct / 100) if target_pct else np.nan
+    return stop, target
+
+
+def trigger_mask(highs, lows, stop, target):
+    with np.errstate(invalid='ignore'):
+        return (lows <= stop) | (highs >= target)
+
+
+def fill(opens, lows, stop, target):
+    # Preço de execução nos candles que dispararam (stop tem prioridade)
+    with np.errstate(invalid='ignore'):
+        stop_hit = lows <= stop
+    price = np.where(stop_hit, np.minimum(opens, stop), np.maximum(opens, target))
+    kind = np.where(stop_hit, 'Stop', 'Alvo')
+    return price, kind
+
+
+def first_trigger(opens, highs, lows, start, end, stop, target):
+    # Primeiro candle em [start, end) que aciona stop/alvo: (candle, preço, tipo) ou None.
+    # Com end = start + 1 é O(1); num salto grande é uma varredura vetorizada.
+    if np.isnan(stop) and np.isnan(target):
+        return None
+
+    hit = trigger_mask(highs[start:end], lows[start:end], stop, target)
+    if not hit.any():
+        return None
+
+    bar = start + int(hit.argmax())
+    price, kind = fill(opens[bar], lows[bar], stop, target)
+    return bar, float(price), str(kind)
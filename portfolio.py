@@ -0,0 +1,419 @@
+'''
+Replay de carteira: vários tickers no mesmo relógio (datas em comum).
+
+Uso:
+    python portfolio.py
+e no campo "Ação" colocar os tickers separados por vírgula, ex.:
+    PETR4.SA, VALE3.SA, ITUB4.SA
+
+Cada ativo tem sua própria posição, o capital é compartilhado e a marcação
+a mercado de cada passo é um único produto vetorial (ações x fechamentos).
+'''
+import yfinance as yf
+import pandas as pd
+import numpy as np
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime
+
+import orders
+import render
+from dateindex import DateIndex
+from replaytrade import SwingTradeSimulator
+
+
+def align_frames(frames):
+    # Mantém só as datas presentes em todos os ativos (relógio comum)
+    common = None
+    for df in frames.values():
+        dates = pd.Index(df['Date'])
+        common = dates if common is None else common.intersection(dates)
+
+    aligned = {}
+    for symbol, df in frames.items():
+        df = df.set_index('Date').loc[common].reset_index()
+        aligned[symbol] = df
+    return aligned
+
+
+class PortfolioReplay:
+    def __init__(self, frames, initial_capital=10000.0, allocation=None):
+        # frames: {símbolo: DataFrame já alinhado no mesmo índice de datas}
+        self.symbols = list(frames)
+        self.frames = frames
+        self.dates = pd.DatetimeIndex(frames[self.symbols[0]]['Date'])
+
+        # ===== Matrizes datas x símbolos =====
+        self.open = np.column_stack([frames[s]['Open'].to_numpy(float) for s in self.symbols])
+        self.high = np.column_stack([frames[s]['High'].to_numpy(float) for s in self.symbols])
+        self.low = np.column_stack([frames[s]['Low'].to_numpy(float) for s in self.symbols])
+        self.close = np.column_stack([frames[s]['Close'].to_numpy(float) for s in self.symbols])
+
+        # Fração do patrimônio por entrada (padrão: divisão igual entre os ativos)
+        n = len(self.symbols)
+        self.allocation = allocation if allocation is not None else 1.0 / n
+
+        # ===== Estado da carteira (um slot por símbolo) =====
+        self.initial_capital = initial_capital
+        self.cash = initial_capital
+        self.shares = np.zeros(n, dtype=np.int64)
+        self.entry_price = np.zeros(n)
+        self.entry_index = np.full(n, -1, dtype=np.int64)
+        self.entry_fraction = np.zeros(n)  # fração do patrimônio usada na entrada
+        self.stop = np.full(n, np.nan)
+        self.target = np.full(n, np.nan)
+        self.trades_history = []
+        self.equity_curve = []
+
+    @property
+    def n_bars(self):
+        return self.close.shape[0]
+
+    def index_of(self, symbol):
+        return self.symbols.index(symbol)
+
+    def equity(self, current_index):
+        # Marcação a mercado de todos os ativos de uma vez
+        if current_index <= 0:
+            return self.cash
+        return self.cash + float(self.shares @ self.close[current_index - 1])
+
+    def record_equity(self, current_index):
+        if self.shares.any():
+            self.equity_curve.append(self.equity(current_index))
+
+    def record_equity_range(self, start, end):
+        # Marcação de todos os candles pulados numa multiplicação de matriz
+        if self.shares.any() and end > start:
+            self.equity_curve.extend(self.cash + self.close[start:end] @ self.shares)
+
+    def open_positions(self):
+        return int(np.count_nonzero(self.shares))
+
+    def position(self, j):
+        # Mesmo formato do self.position do simulador
+        if self.shares[j] == 0:
+            return None
+        return {
+            'shares': int(self.shares[j]),
+            'entry_price': float(self.entry_price[j]),
+            'entry_date': self.dates[self.entry_index[j]],
+            'stop': float(self.stop[j]),
+            'target': float(self.target[j]),
+        }
+
+    def buy(self, j, current_index, stop_pct=None, target_pct=None):
+        if self.shares[j] != 0:
+            return 0
+
+        price = self.close[current_index - 1, j]
+        budget = min(self.cash, self.equity(current_index) * self.allocation)
+        shares = int(budget / price)
+        if shares == 0:
+            return 0
+
+        self.entry_fraction[j] = shares * price / self.equity(current_index)
+        self.cash -= shares * price
+        self.shares[j] = shares
+        self.entry_price[j] = price
+        self.entry_index[j] = current_index - 1
+        self.stop[j], self.target[j] = orders.levels(price, stop_pct, target_pct)
+        return shares
+
+    def sell(self, j, current_index, exit_price=None):
+        if self.shares[j] == 0:
+            return None
+
+        if exit_price is None:
+            exit_price = self.close[current_index - 1, j]
+        shares = int(self.shares[j])
+        entry_value = shares * self.entry_price[j]
+        exit_value = shares * exit_price
+        profit = exit_value - entry_value
+
+        self.cash += exit_value
+
+        trade = {
+            'symbol': self.symbols[j],
+            'entry_date': self.dates[self.entry_index[j]],
+            'exit_date': self.dates[current_index - 1],
+            'entry_price': float(self.entry_price[j]),
+            'exit_price': float(exit_price),
+            'shares': shares,
+            'profit': float(profit),
+            'profit_pct': float(profit / entry_value * 100),
+            'allocation': float(self.entry_fraction[j]),
+        }
+        self.trades_history.append(trade)
+
+        self.shares[j] = 0
+        self.entry_price[j] = 0.0
+        self.entry_index[j] = -1
+        self.entry_fraction[j] = 0.0
+        self.stop[j] = self.target[j] = np.nan
+        return trade
+
+    def run_orders(self, start, end, record_equity=False):
+        # Stop/alvo de todos os ativos nos candles [start, end) numa varredura só
+        held = self.shares != 0
+        if not held.any():
+            return []
+
+        n = end - start
+        hit = orders.trigger_mask(self.high[start:end], self.low[start:end], self.stop, self.target) & held
+        triggered = hit.any(axis=0)
+        first = np.where(triggered, hit.argmax(axis=0), n)
+
+        cols = np.flatnonzero(triggered)
+        bars = start + first[cols]
+        prices, kinds = orders.fill(self.open[bars, cols], self.low[bars, cols], self.stop[cols], self.target[cols])
+
+        if record_equity:
+            # Cada ativo vale o fechamento até sair e o preço de saída depois; só os
+            # candles com alguma posição ainda aberta entram (como no passo a passo)
+            rows = first[held].max()
+            exit_value = np.zeros(len(self.symbols))
+            exit_value[cols] = prices
+            still_held = np.arange(rows)[:, None] < first[None, :]
+            values = np.where(still_held, self.close[start:start + rows], exit_value) @ self.shares
+            self.equity_curve.extend(self.cash + values)
+
+        closed = []
+        for k in np.argsort(bars, kind='stable'):
+            j = cols[k]
+            trade = self.sell(j, bars[k] + 1, exit_price=float(prices[k]))
+            trade['exit_type'] = str(kinds[k])
+            closed.append(trade)
+        return closed
+
+
+class PortfolioSimulator(SwingTradeSimulator):
+    def __init__(self, root):
+        self.engine = None
+        self.symbol = None
+        super().__init__(root)
+        self.root.title("Simulador de Swing Trade - Carteira")
+
+    def setup_ui(self):
+        super().setup_ui()
+
+        self.ticker_entry.config(width=30)
+        self.ticker_entry.delete(0, tk.END)
+        self.ticker_entry.insert(0, "PETR4.SA, VALE3.SA, ITUB4.SA")
+
+        # Troca de ativo no gráfico (sem recarregar dados)
+        tk.Frame(self.control_frame, width=2, bg='gray').pack(side=tk.LEFT, fill=tk.Y, padx=10)
+        tk.Label(self.control_frame, text="Gráfico:", bg='#2b2b2b', fg='white',
+                 font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
+        self.symbol_box = ttk.Combobox(self.control_frame, state='readonly', width=12)
+        self.symbol_box.pack(side=tk.LEFT, padx=5)
+        self.symbol_box.bind("<<ComboboxSelected>>", lambda e: self.select_symbol(self.symbol_box.get()))
+
+    def create_stats_labels(self):
+        super().create_stats_labels()
+
+        frame = tk.Frame(self.stats_frame, bg='#2b2b2b')
+        frame.pack(fill=tk.X, pady=3)
+        tk.Label(frame, text="Posições Abertas:", bg='#2b2b2b', fg='#aaaaaa',
+                 font=('Arial', 9), anchor=tk.W).pack(side=tk.LEFT)
+        val_label = tk.Label(frame, text="0", bg='#2b2b2b', fg='white',
+                             font=('Arial', 9, 'bold'), anchor=tk.E)
+        val_label.pack(side=tk.RIGHT)
+        self.stat_labels["Posições Abertas:"] = val_label
+
+    def load_data(self):
+        tickers = [t.strip() for t in self.ticker_entry.get().split(",") if t.strip()]
+        start_date = self.date_entry.get().strip()
+
+        if not tickers:
+            messagebox.showerror("Erro", "Informe ao menos um ticker")
+            return
+
+        try:
+            self.status_bar.config(text=f"Carregando {len(tickers)} ativos...")
+            self.root.update()
+
+            # Um único download para todos os tickers
+            end_date = datetime.now().strftime('%Y-%m-%d')
+            df_all = yf.download(tickers, start=start_date, end=end_date,
+                                 progress=False, group_by='ticker')
+
+            if df_all.empty:
+                messagebox.showerror("Erro", "Nenhum dado encontrado para estes ativos/período")
+                return
+
+            frames = {}
+            required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+            for ticker in tickers:
+                if isinstance(df_all.columns, pd.MultiIndex):
+                    if ticker not in df_all.columns.get_level_values(0):
+                        continue
+                    df_temp = df_all[ticker]
+                else:
+                    df_temp = df_all
+
+                df_temp = df_temp.dropna(how='all').reset_index()
+                if df_temp.empty or not all(col in df_temp.columns for col in required_cols):
+                    continue
+                frames[ticker] = df_temp
+
+            if not frames:
+                messagebox.showerror("Erro", "Dados incompletos dos ativos")
+                return
+
+            frames = align_frames(frames)
+
+            # Indicadores por ativo (reaproveita a fórmula do simulador)
+            for symbol, df in frames.items():
+                self.df = df
+                self.calculate_indicators()
+
+            self.engine = PortfolioReplay(frames, initial_capital=self.initial_capital)
+            self.date_index = DateIndex(self.engine.dates)
+            self.current_index = min(50, self.engine.n_bars)
+            self.scrubber.config(to=self.engine.n_bars)
+
+            # Resetar trading
+            self.capital = self.engine.cash
+            self.trades_history = self.engine.trades_history
+            self.equity_curve = self.engine.equity_curve
+
+            self.trades_view.clear()
+
+            self.symbol_box.config(values=self.engine.symbols)
+            self.symbol_box.set(self.engine.symbols[0])
+            self.select_symbol(self.engine.symbols[0])
+            self.sync_scrubber()
+
+            self.status_bar.config(text=f"Dados carregados: {len(frames)} ativos, "
+                                        f"{self.engine.n_bars} candles em comum")
+
+        except Exception as e:
+            import traceback
+            messagebox.showerror("Erro", f"Erro ao carregar dados: {str(e)}\n\n{traceback.format_exc()}")
+            self.status_bar.config(text="Erro ao carregar dados")
+
+    def select_symbol(self, symbol):
+        if self.engine is None or symbol not in self.engine.frames:
+            return
+
+        self.symbol = symbol
+        j = self.engine.index_of(symbol)
+        self.df = self.engine.frames[symbol]
+        self.position = self.engine.position(j)
+        render.invalidate_layouts(self.fig)
+        self.offscreen.invalidate()
+
+        self.btn_buy.config(state=tk.DISABLED if self.position else tk.NORMAL)
+        self.btn_sell.config(state=tk.NORMAL if self.position else tk.DISABLED)
+
+        self.update_stats()
+        self.plot_candles()
+
+    def open_hit(self, symbol, date):
+        # Sinal do scanner: mostra o ativo da carteira no candle do sinal (sem trocar a carteira)
+        if self.engine is None or symbol not in self.engine.frames:
+            messagebox.showwarning("Aviso", f"{symbol} não está na carteira carregada")
+            return
+
+        self.symbol_box.set(symbol)
+        self.select_symbol(symbol)
+        self.seek(self.date_index.at_or_before(date) + 1)
+        self.update_stats()
+        self.status_bar.config(text=f"{symbol}: sinal em {pd.Timestamp(date).strftime('%d/%m/%Y')}")
+
+    def chart_label(self):
+        return self.symbol or super().chart_label()
+
+    def update_equity_curve(self):
+        self.engine.record_equity(self.current_index)
+
+    def run_orders(self, start, end, record_equity=False):
+        if self.engine is None:
+            return
+
+        closed = self.engine.run_orders(start, end, record_equity)
+        if not closed:
+            return
+
+        for trade in closed:
+            self.trades_view.append(trade)
+        self.frame_cache.clear()
+
+        self.capital = self.engine.cash
+        self.position = self.engine.position(self.engine.index_of(self.symbol))
+        self.btn_buy.config(state=tk.DISABLED if self.position else tk.NORMAL)
+        self.btn_sell.config(state=tk.NORMAL if self.position else tk.DISABLED)
+        self.update_stats()
+
+        last = closed[-1]
+        self.status_bar.config(text=f"{last['exit_type']} {last['symbol']}: R$ {last['exit_price']:.2f} "
+                                    f"({last['profit_pct']:+.2f}%) | {len(closed)} saída(s) por ordem")
+
+    def record_equity_range(self, start, end):
+        self.engine.record_equity_range(start, end)
+
+    def current_equity(self):
+        if self.engine is None:
+            return self.capital
+        return self.engine.equity(self.current_index)
+
+    def update_stats(self):
+        super().update_stats()
+        if self.engine is not None:
+            self.stat_labels["Posições Abertas:"].config(text=str(self.engine.open_positions()))
+
+    def buy(self):
+        if self.engine is None or self.current_index >= self.engine.n_bars:
+            return
+
+        if self.position:
+            messagebox.showwarning("Aviso", "Você já tem uma posição aberta neste ativo")
+            return
+
+        j = self.engine.index_of(self.symbol)
+        stop_pct, target_pct = self.order_pcts()
+        shares = self.engine.buy(j, self.current_index, stop_pct, target_pct)
+
+        if shares == 0:
+            messagebox.showwarning("Aviso", "Capital insuficiente para comprar")
+            return
+
+        self.capital = self.engine.cash
+        self.position = self.engine.position(j)
+        self.frame_cache.clear()
+
+        self.btn_buy.config(state=tk.DISABLED)
+        self.btn_sell.config(state=tk.NORMAL)
+
+        self.update_stats()
+        self.plot_candles()
+        self.status_bar.config(text=f"Compra {self.symbol}: {shares} ações a "
+                                    f"R$ {self.position['entry_price']:.2f}")
+
+    def sell(self):
+        if not self.position or self.engine is None or self.current_index >= self.engine.n_bars:
+            return
+
+        j = self.engine.index_of(self.symbol)
+        trade = self.engine.sell(j, self.current_index)
+
+        self.capital = self.engine.cash
+
+        self.trades_view.append(trade)
+
+        self.position = None
+        self.frame_cache.clear()
+        self.btn_sell.config(state=tk.DISABLED)
+        self.btn_buy.config(state=tk.NORMAL)
+
+        self.update_stats()
+        self.plot_candles()
+        self.status_bar.config(text=f"Venda {self.symbol}: R$ {trade['exit_price']:.2f} | "
+                                    f"Lucro: R$ {trade['profit']:.2f} ({trade['profit_pct']:+.2f}%)")
+
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = PortfolioSimulator(root)
+    root.mainloop()
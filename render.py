@@ -0,0 +1,257 @@
+'''
+Desenho de um frame do replay em qualquer Figure do matplotlib.
+
+Não depende do Tk: o simulador usa com o FigureCanvasTkAgg e o export
+headless (export.py) usa com o backend Agg.
+
+Os eixos de cada combinação de painéis (volume/RSI/MACD) são criados,
+estilizados e ajustados (tight_layout) uma vez por figura e guardados;
+trocar um painel só alterna qual layout está visível, e cada frame apenas
+remove e redesenha os dados.
+'''
+import warnings
+import weakref
+import numpy as np
+from matplotlib.collections import PolyCollection
+
+import volumeprofile
+from dateindex import date_at
+
+BG = '#2b2b2b'
+PANELS = ("volume", "rsi", "macd")
+
+# figura -> {painéis ativos: FrameLayout}
+_layouts = weakref.WeakKeyDictionary()
+
+
+def bars(ax, x, bottom, height, width, sticky_bottom=False, **kwargs):
+    # Retângulos num único PolyCollection (equivale a ax.bar sem criar um patch por barra)
+    x = np.asarray(x, dtype=float)
+    left = x - width / 2
+    right = x + width / 2
+    top = bottom + height
+    verts = np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([left, top]),
+        np.column_stack([right, top]),
+        np.column_stack([right, bottom]),
+    ], axis=1)
+    collection = PolyCollection(verts, **kwargs)
+    if sticky_bottom:
+        # Igual ao ax.bar: eixo y encosta na base das barras (ex.: volume em 0)
+        collection.sticky_edges.y.append(float(np.min(bottom)))
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
+
+
+def volume_by_price(ax, edges, volume, right, width, **kwargs):
+    # Perfil de volume: barras horizontais encostadas em x=right, a maior com largura width
+    rows = np.flatnonzero(volume > 0)
+    if len(rows) == 0:
+        return None
+    bottom = edges[rows]
+    top = edges[rows + 1]
+    left = right - width * volume[rows] / volume[rows].max()
+    verts = np.stack([
+        np.column_stack([left, bottom]),
+        np.column_stack([left, top]),
+        np.column_stack([np.full(len(rows), right), top]),
+        np.column_stack([np.full(len(rows), right), bottom]),
+    ], axis=1)
+    collection = PolyCollection(verts, **kwargs)
+    ax.add_collection(collection, autolim=False)  # não mexe na escala de preço
+    return collection
+
+
+class FrameLayout:
+    # Eixos de uma combinação de painéis, com estilo e elementos fixos já prontos
+    def __init__(self, fig, panels):
+        self.gridspec = fig.add_gridspec(len(panels) + 1, 1)
+        self.axes = {"price": fig.add_subplot(self.gridspec[0])}
+        for row, name in enumerate(panels, 1):
+            self.axes[name] = fig.add_subplot(self.gridspec[row], sharex=self.axes["price"])
+
+        # ===== Cor de fundo e cores dos eixos =====
+        for ax in self.axes.values():
+            ax.set_facecolor(BG)
+            ax.tick_params(colors='white')
+            ax.yaxis.label.set_color('white')
+            ax.xaxis.label.set_color('white')
+            ax.title.set_color('white')
+            ax.grid(True, alpha=0.2, color='gray')
+
+        if "volume" in self.axes:
+            self.axes["volume"].set_ylabel("Volume")
+
+        if "rsi" in self.axes:
+            ax_rsi = self.axes["rsi"]
+            ax_rsi.axhline(70, color="red", linestyle="--")
+            ax_rsi.axhline(30, color="green", linestyle="--")
+            ax_rsi.set_ylim(0, 100)
+            ax_rsi.set_ylabel("RSI")
+
+        self.static = {artist for ax in self.axes.values() for artist in self._artists(ax)}
+        self.tight_size = None  # tamanho da figura do último tight_layout
+
+    @staticmethod
+    def _artists(ax):
+        return [*ax.lines, *ax.collections, *ax.patches, *ax.texts]
+
+    def clear(self):
+        # Remove só os dados do frame anterior (mantém estilo e linhas fixas)
+        for ax in self.axes.values():
+            for artist in self._artists(ax):
+                if artist not in self.static:
+                    artist.remove()
+            if ax.get_legend():
+                ax.get_legend().remove()
+            ax.relim()
+
+    def fit(self, fig):
+        # tight_layout só na primeira vez (ou se a janela mudou de tamanho)
+        size = tuple(fig.get_size_inches())
+        if self.tight_size != size:
+            with warnings.catch_warnings():
+                # Eixos dos outros layouts (ocultos) não são deste gridspec e ficam de fora
+                warnings.filterwarnings("ignore", message="This figure includes Axes")
+                self.gridspec.tight_layout(fig)
+            # gridspec.update só reposiciona eixos de figuras do pyplot
+            for ax in self.axes.values():
+                ax.set_position(ax.get_subplotspec().get_position(fig))
+            self.tight_size = size
+
+
+def get_layout(fig, show):
+    layouts = _layouts.get(fig)
+    if layouts is None:
+        fig.clear()  # eixos criados fora daqui (ex.: o subplot inicial do simulador)
+        fig.patch.set_facecolor(BG)
+        layouts = _layouts[fig] = {}
+
+    panels = tuple(name for name in PANELS if show[name])
+    layout = layouts.get(panels)
+    if layout is None:
+        layout = layouts[panels] = FrameLayout(fig, panels)
+
+    for other in layouts.values():
+        for ax in other.axes.values():
+            ax.set_visible(other is layout)
+    return layout
+
+
+def invalidate_layouts(fig):
+    # Dados novos (outra escala de preço/volume): refaz o tight_layout no próximo frame
+    for layout in _layouts.get(fig, {}).values():
+        layout.tight_size = None
+
+
+def draw_frame(fig, df, start_idx, end_idx, show, title, position=None, orders=None, trades=None):
+    # show: {"sma", "ema", "bb", "rsi", "macd", "volume", "vwap", "profile"} -> bool
+    # position: (candle de entrada, preço de entrada) da posição aberta no frame
+    # orders: (stop, alvo) da posição aberta, NaN quando não há ordem
+    # trades: lista de (candle entrada, preço entrada, candle saída, preço saída) já fechados
+
+    # ===== Layout da combinação de painéis (cacheado) =====
+    layout = get_layout(fig, show)
+    layout.clear()
+    axes = dict(layout.axes)
+    ax_price = axes["price"]
+
+    # ===== Janela de candles =====
+    df_slice = df.iloc[start_idx:end_idx]
+    if len(df_slice) == 0:
+        return axes, df_slice
+
+    x = range(len(df_slice))
+
+    # ===== Plotar candles =====
+    # Uma coleção para os corpos e outra para os pavios, em vez de um
+    # artista por candle (mesma aparência, bem menos objetos por frame)
+    opens = df_slice['Open'].to_numpy()
+    closes = df_slice['Close'].to_numpy()
+    colors = np.where(closes >= opens, '#00ff00', '#ff0000')
+
+    bars(ax_price, x, np.minimum(opens, closes), np.abs(closes - opens), 0.6,
+         facecolors=colors, edgecolors=colors, alpha=0.8)
+    ax_price.vlines(x, df_slice['Low'].to_numpy(), df_slice['High'].to_numpy(),
+                    colors=colors, linewidth=1)
+
+    # ===== Indicadores no preço =====
+    if show["sma"]:
+        ax_price.plot(x, df_slice["SMA"], color="yellow", linewidth=1, label="SMA")
+
+    if show["ema"]:
+        ax_price.plot(x, df_slice["EMA"], color="cyan", linewidth=1, label="EMA")
+
+    if show["bb"]:
+        ax_price.plot(x, df_slice["BB_UP"], color="gray", linestyle="--", linewidth=1)
+        ax_price.plot(x, df_slice["BB_DN"], color="gray", linestyle="--", linewidth=1)
+
+    # ===== VWAP / perfil de volume da janela (somas acumuladas, sem varrer a janela) =====
+    if show["vwap"] or show["profile"]:
+        profile = volumeprofile.for_frame(df)
+
+    if show["vwap"]:
+        ax_price.plot(x, profile.vwap(start_idx, end_idx), color="magenta", linewidth=1, label="VWAP")
+
+    if show["profile"]:
+        edges, volume = profile.histogram(start_idx, end_idx)
+        poc = np.argmax(volume)
+        colors = np.where(np.arange(len(volume)) == poc, 'orange', 'C0')[volume > 0]
+        volume_by_price(ax_price, edges, volume, len(df_slice), len(df_slice) * 0.3,
+                        facecolors=colors, edgecolors='none', alpha=0.3, zorder=0)
+
+    # ===== Trades fechados (log) =====
+    for entry_bar, entry_price, exit_bar, exit_price in trades or ():
+        if start_idx <= entry_bar < end_idx:
+            ax_price.plot(entry_bar - start_idx, entry_price, 'g^', markersize=10)
+        if start_idx <= exit_bar < end_idx:
+            ax_price.plot(exit_bar - start_idx, exit_price, 'rv', markersize=10)
+
+    # ===== Marcar compra =====
+    if position is not None:
+        entry_bar, entry_price = position
+        if start_idx <= entry_bar < end_idx:
+            ax_price.plot(entry_bar - start_idx, entry_price, 'g^', markersize=14)
+            ax_price.axhline(entry_price, color='green', linestyle='--', alpha=0.5)
+
+    # ===== Stop / alvo =====
+    if orders is not None:
+        stop, target = orders
+        if not np.isnan(stop):
+            ax_price.axhline(stop, color='red', linestyle=':', linewidth=1)
+        if not np.isnan(target):
+            ax_price.axhline(target, color='deepskyblue', linestyle=':', linewidth=1)
+
+    # ===== Volume =====
+    if show["volume"]:
+        bars(axes["volume"], x, np.zeros(len(df_slice)), df_slice["Volume"].to_numpy(), 0.8,
+             sticky_bottom=True, facecolors='C0', alpha=0.3)
+
+    # ===== RSI =====
+    if show["rsi"]:
+        axes["rsi"].plot(x, df_slice["RSI"], color="orange")
+
+    # ===== MACD =====
+    if show["macd"]:
+        ax_macd = axes["macd"]
+        # Cores fixas: os eixos são reaproveitados e o ciclo de cores não reinicia
+        ax_macd.plot(x, df_slice["MACD"], color="C0", label="MACD")
+        ax_macd.plot(x, df_slice["MACD_SIGNAL"], color="C1", label="Signal")
+        ax_macd.legend()
+
+    # ===== Estética =====
+    ax_price.set_xlim(-1, len(df_slice))
+
+    current_date = date_at(df, end_idx - 1)
+    current_close = df_slice['Close'].iloc[-1]
+
+    ax_price.set_title(
+        f'{title} - {current_date.strftime("%d/%m/%Y")} '
+        f'- Fechamento: R$ {current_close:.2f}'
+    )
+
+    layout.fit(fig)
+
+    return axes, df_slice
@@ -3,21 +3,35 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
-from matplotlib.patches import Rectangle
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
 import matplotlib.animation as animation
 import matplotlib.dates as mdates
 
+import datastore
+import framecache
+import indicators
+import montecarlo
+import orders
+import render
+from dateindex import UNIT_NS, DateIndex, parse_date
+from scanner import ScannerWindow, compile_rule, evaluate_rule
+from tradelist import VirtualTradeList
+
 class SwingTradeSimulator:
-    def __init__(self, root):
+    def __init__(self, root, container=None, frame_cache=None):
         self.root = root
-        self.root.title("Simulador de Swing Trade")
-        self.root.geometry("1400x900")
+        # Frame onde a interface é montada: a janela inteira ou um painel (multipane.py)
+        self.container = container if container is not None else root
+        if container is None:
+            self.root.title("Simulador de Swing Trade")
+            self.root.geometry("1400x900")
         
         # Variáveis de controle
         self.df = None
+        self.date_index = None
+        self.compact = False  # float32/int (metade da memória), vale no próximo carregamento
         self.current_index = 50
         self.is_playing = False
         self.speed = 500  # milliseconds
@@ -30,6 +44,8 @@ class SwingTradeSimulator:
         self.show_rsi = False
         self.show_macd = False
         self.show_volume = False
+        self.show_vwap = False
+        self.show_profile = False  # perfil de volume (volume por preço) da janela
 
         # Zoom (quantidade de candles visíveis)
         self.window_size = 50
@@ -42,6 +58,7 @@ class SwingTradeSimulator:
         self.bb_period = 20
         self.bb_std = 2
         self.rsi_period = 14
+        self.extra_indicators = []  # indicadores próprios do registro: [(nome, {parâmetros}), ...]
 
         # Controle de trades
         self.initial_capital = 10000.0
@@ -53,6 +70,14 @@ class SwingTradeSimulator:
         self.df_plot = None
         self.tooltip = None
         self.start_idx = 0
+        self.signal_cache = None  # (df, regra, máscara) do último "próximo sinal"
+        
+        # Frames já renderizados (voltar/avançar sobre eles é só blit)
+        self.frame_cache = frame_cache if frame_cache is not None else framecache.FrameCache()
+        self.offscreen = framecache.OffscreenRenderer()
+        self.figure_stale = False  # figura mostra um bitmap do cache, não os artistas atuais
+        self.last_frame_index = 0
+        self.prefetch_id = None
   
         self.setup_ui()
 
@@ -63,29 +88,17 @@ class SwingTradeSimulator:
     def calculate_indicators(self):
         df = self.df
 
-        df["SMA"] = df["Close"].rolling(self.sma_period).mean()
-        df["EMA"] = df["Close"].ewm(span=self.ema_period, adjust=False).mean()
-
-        # Bollinger
-        ma = df["Close"].rolling(self.bb_period).mean()
-        std = df["Close"].rolling(self.bb_period).std()
-        df["BB_UP"] = ma + self.bb_std * std
-        df["BB_DN"] = ma - self.bb_std * std
-
-        # RSI
-        delta = df["Close"].diff()
-        gain = delta.clip(lower=0)
-        loss = -delta.clip(upper=0)
-        avg_gain = gain.rolling(self.rsi_period).mean()
-        avg_loss = loss.rolling(self.rsi_period).mean()
-        rs = avg_gain / avg_loss
-        df["RSI"] = 100 - (100 / (1 + rs))
-
-        # MACD
-        ema12 = df["Close"].ewm(span=12, adjust=False).mean()
-        ema26 = df["Close"].ewm(span=26, adjust=False).mean()
-        df["MACD"] = ema12 - ema26
-        df["MACD_SIGNAL"] = df["MACD"].ewm(span=9, adjust=False).mean()
+        values = indicators.compute_all(
+            df["Close"],
+            sma_period=self.sma_period,
+            ema_period=self.ema_period,
+            bb_period=self.bb_period,
+            bb_std=self.bb_std,
+            rsi_period=self.rsi_period,
+            extra=self.extra_indicators,
+        )
+        for name, column in values.items():
+            df[name] = column
 
     def zoom_in(self, event=None):
         if self.window_size > self.min_window:
@@ -130,7 +143,7 @@ class SwingTradeSimulator:
         row = self.df_plot.iloc[x]
 
         text = (
-            f"Data: {row['Date'].strftime('%d/%m/%Y')}\n"
+            f"Data: {self.date_index.timestamp(self.start_idx + x).strftime('%d/%m/%Y')}\n"
             f"Open:  {row['Open']:.2f}\n"
             f"High:  {row['High']:.2f}\n"
             f"Low:   {row['Low']:.2f}\n"
@@ -144,6 +157,13 @@ class SwingTradeSimulator:
 
         self.canvas.draw_idle()
 
+    def redraw(self):
+        # Com um frame do cache na tela, draw_idle pintaria os artistas de outro frame
+        if self.figure_stale:
+            self.plot_candles(use_cache=False)
+        else:
+            self.canvas.draw_idle()
+
     def on_mouse_move(self, event):
 
         # Segurança total
@@ -154,8 +174,12 @@ class SwingTradeSimulator:
         if event.key != "control":
             if self.tooltip.get_visible():
                 self.tooltip.set_visible(False)
-                self.canvas.draw_idle()
+                self.redraw()
             return
+        
+        # Frame veio do cache: desenha de verdade antes de mexer nos artistas
+        if self.figure_stale:
+            self.plot_candles(use_cache=False)
         	
         # Mouse fora do eixo
         if event.inaxes != self.ax:
@@ -181,7 +205,7 @@ class SwingTradeSimulator:
         row = self.df_plot.iloc[x]
 
         texto = (
-            f"Data: {row['Date'].strftime('%d/%m/%Y')}\n"
+            f"Data: {self.date_index.timestamp(self.start_idx + x).strftime('%d/%m/%Y')}\n"
             f"Abertura: {row['Open']:.2f}\n"
             f"Máxima: {row['High']:.2f}\n"
             f"Mínima: {row['Low']:.2f}\n"
@@ -211,8 +235,9 @@ class SwingTradeSimulator:
         
     def setup_ui(self):
         # Frame superior para controles
-        control_frame = tk.Frame(self.root, bg='#2b2b2b', pady=10)
+        control_frame = tk.Frame(self.container, bg='#2b2b2b', pady=10)
         control_frame.pack(side=tk.TOP, fill=tk.X)
+        self.control_frame = control_frame
         
         # Entrada de dados
         tk.Label(control_frame, text="Ação:", bg='#2b2b2b', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
@@ -228,6 +253,12 @@ class SwingTradeSimulator:
         tk.Button(control_frame, text="Carregar", command=self.load_data, 
                  bg='#4a4a4a', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
         
+        self.compact_var = tk.BooleanVar(value=self.compact)
+        tk.Checkbutton(control_frame, text="Compacto", variable=self.compact_var,
+                       command=lambda: setattr(self, 'compact', self.compact_var.get()),
+                       bg='#2b2b2b', fg='white', selectcolor='#4a4a4a',
+                       activebackground='#2b2b2b', font=('Arial', 9)).pack(side=tk.LEFT, padx=5)
+        
         # Separador
         tk.Frame(control_frame, width=2, bg='gray').pack(side=tk.LEFT, fill=tk.Y, padx=10)
         
@@ -244,6 +275,21 @@ class SwingTradeSimulator:
                                     bg='#4a4a4a', fg='white', font=('Arial', 12), width=4)
         self.btn_forward.pack(side=tk.LEFT, padx=2)
         
+        # Ir para data
+        self.goto_entry = tk.Entry(control_frame, width=11, font=('Arial', 10))
+        self.goto_entry.pack(side=tk.LEFT, padx=(10, 2))
+        self.goto_entry.bind("<Return>", lambda e: self.goto_date())
+        tk.Button(control_frame, text="Ir", command=self.goto_date,
+                 bg='#4a4a4a', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=2)
+        
+        # Avançar até o próximo candle que satisfaz a regra (mesma sintaxe do scanner)
+        self.signal_entry = tk.Entry(control_frame, width=22, font=('Arial', 10))
+        self.signal_entry.insert(0, "cross_above(RSI, 30)")
+        self.signal_entry.pack(side=tk.LEFT, padx=(10, 2))
+        self.signal_entry.bind("<Return>", lambda e: self.next_signal())
+        tk.Button(control_frame, text="⏭ Sinal", command=self.next_signal,
+                 bg='#4a4a4a', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=2)
+        
         # Separador
         tk.Frame(control_frame, width=2, bg='gray').pack(side=tk.LEFT, fill=tk.Y, padx=10)
         
@@ -257,6 +303,15 @@ class SwingTradeSimulator:
         self.btn_sell.pack(side=tk.LEFT, padx=5)
         self.btn_sell.config(state=tk.DISABLED)
         
+        # Stop / alvo (% sobre o preço de entrada, valem para a próxima compra)
+        tk.Label(control_frame, text="Stop %:", bg='#2b2b2b', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=(10, 2))
+        self.stop_entry = tk.Entry(control_frame, width=5, font=('Arial', 10))
+        self.stop_entry.pack(side=tk.LEFT, padx=2)
+        
+        tk.Label(control_frame, text="Alvo %:", bg='#2b2b2b', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=(5, 2))
+        self.target_entry = tk.Entry(control_frame, width=5, font=('Arial', 10))
+        self.target_entry.pack(side=tk.LEFT, padx=2)
+        
         # Separador
         tk.Frame(control_frame, width=2, bg='gray').pack(side=tk.LEFT, fill=tk.Y, padx=10)
         
@@ -268,8 +323,17 @@ class SwingTradeSimulator:
         self.speed_scale.set(500)
         self.speed_scale.pack(side=tk.LEFT, padx=5)
         
+        # Separador
+        tk.Frame(control_frame, width=2, bg='gray').pack(side=tk.LEFT, fill=tk.Y, padx=10)
+        
+        tk.Button(control_frame, text="Scanner", command=self.open_scanner,
+                 bg='#4a4a4a', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
+        
+        tk.Button(control_frame, text="Monte Carlo", command=self.run_monte_carlo,
+                 bg='#4a4a4a', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
+        
         # Frame principal
-        main_frame = tk.Frame(self.root)
+        main_frame = tk.Frame(self.container)
         main_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
         
         # Frame esquerdo (gráfico)
@@ -283,10 +347,19 @@ class SwingTradeSimulator:
         from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         self.canvas = FigureCanvasTkAgg(self.fig, master=left_frame)
         self.canvas.draw()
+        
+        # Barra de navegação (arrastar = ir direto para o candle)
+        self.scrubber = tk.Scale(left_frame, from_=1, to=1, orient=tk.HORIZONTAL, showvalue=False,
+                                 command=self.on_scrub, bg='#4a4a4a', troughcolor='#666666',
+                                 highlightthickness=0)
+        self.scrubber.pack(side=tk.BOTTOM, fill=tk.X)
+        self.scrub_id = None
+        
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
         # conexão do mouse (AQUI)
         self.canvas.mpl_connect("motion_notify_event", self.on_mouse_move)
+        self.canvas.mpl_connect("resize_event", self.on_resize)
 
         
         # Frame direito (estatísticas)
@@ -308,35 +381,18 @@ class SwingTradeSimulator:
                                font=('Arial', 12, 'bold'))
         trades_label.pack(pady=(20, 5))
         
-        # Criar Treeview para trades
-        columns = ('Data', 'Tipo', 'Preço', 'Result %')
-        self.trades_tree = ttk.Treeview(right_frame, columns=columns, show='headings', height=10)
-        
-        for col in columns:
-            self.trades_tree.heading(col, text=col)
-            self.trades_tree.column(col, width=70, anchor='center')
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(right_frame, orient=tk.VERTICAL, command=self.trades_tree.yview)
-        self.trades_tree.configure(yscroll=scrollbar.set)
-        
-        self.trades_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Lista virtualizada de trades (só desenha as linhas visíveis)
+        self.trades_view = VirtualTradeList(right_frame)
+        self.trades_view.pack(fill=tk.BOTH, expand=True)
         
         # Status bar
-        self.status_bar = tk.Label(self.root, text="Carregue uma ação para começar", 
+        self.status_bar = tk.Label(self.container, text="Carregue uma ação para começar", 
                                   bg='#3a3a3a', fg='white', anchor=tk.W, font=('Arial', 9))
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
         # ===== Atalhos =====
-        self.root.bind("1", lambda e: self.toggle_indicator("sma"))
-        self.root.bind("2", lambda e: self.toggle_indicator("ema"))
-        self.root.bind("3", lambda e: self.toggle_indicator("bb"))
-        self.root.bind("4", lambda e: self.toggle_indicator("rsi"))
-        self.root.bind("5", lambda e: self.toggle_indicator("macd"))
-        self.root.bind("6", lambda e: self.toggle_indicator("volume"))
-        self.root.bind("+", self.zoom_in)
-        self.root.bind("-", self.zoom_out)
+        if self.container is self.root:
+            self.bind_shortcuts(self.root)
 
         '''
 ATALHOS do ROOT.BIND
@@ -346,9 +402,23 @@ ATALHOS do ROOT.BIND
 4 = RSI
 5 = MACD
 6 = Volume
+7 = VWAP
+8 = Perfil de volume
 +/-=mais ou menos candles
         '''
         
+    def bind_shortcuts(self, widget):
+        widget.bind("1", lambda e: self.toggle_indicator("sma"))
+        widget.bind("2", lambda e: self.toggle_indicator("ema"))
+        widget.bind("3", lambda e: self.toggle_indicator("bb"))
+        widget.bind("4", lambda e: self.toggle_indicator("rsi"))
+        widget.bind("5", lambda e: self.toggle_indicator("macd"))
+        widget.bind("6", lambda e: self.toggle_indicator("volume"))
+        widget.bind("7", lambda e: self.toggle_indicator("vwap"))
+        widget.bind("8", lambda e: self.toggle_indicator("profile"))
+        widget.bind("+", self.zoom_in)
+        widget.bind("-", self.zoom_out)
+        
     def create_stats_labels(self):
         stats = [
             ("Capital Inicial:", f"R$ {self.initial_capital:,.2f}"),
@@ -402,177 +472,188 @@ ATALHOS do ROOT.BIND
             if isinstance(df_temp.columns, pd.MultiIndex):
                 df_temp.columns = df_temp.columns.get_level_values(0)
             
-            # Certificar-se de que as colunas existem
-            required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
-            if not all(col in df_temp.columns for col in required_cols):
-                messagebox.showerror("Erro", "Dados incompletos da ação")
-                return
-            
-            self.df = df_temp
-            self.calculate_indicators()
-            self.current_index = min(50, len(self.df))
-            
-            # Resetar trading
-            self.capital = self.initial_capital
-            self.position = None
-            self.trades_history = []
-            self.equity_curve = []
-            self.btn_sell.config(state=tk.DISABLED)
-            self.btn_buy.config(state=tk.NORMAL)
-            
-            # Limpar treeview
-            for item in self.trades_tree.get_children():
-                self.trades_tree.delete(item)
-            
-            self.update_stats()
-            self.plot_candles()
-            self.status_bar.config(text=f"Dados carregados: {len(self.df)} candles")
+            self.set_data(df_temp)
             
         except Exception as e:
             import traceback
             messagebox.showerror("Erro", f"Erro ao carregar dados: {str(e)}\n\n{traceback.format_exc()}")
             self.status_bar.config(text="Erro ao carregar dados")
     
-    def plot_candles(self):
-        if self.df is None or len(self.df) == 0:
+    def set_data(self, df_temp):
+        # Certificar-se de que as colunas existem
+        required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+        if not all(col in df_temp.columns for col in required_cols):
+            messagebox.showerror("Erro", "Dados incompletos da ação")
+            return False
+        
+        self.update_frame(df_temp)
+        render.invalidate_layouts(self.fig)
+        self.offscreen.invalidate()
+        self.current_index = min(50, len(self.df))
+        
+        # Resetar trading
+        self.capital = self.initial_capital
+        self.position = None
+        self.trades_history = []
+        self.equity_curve = []
+        self.btn_sell.config(state=tk.DISABLED)
+        self.btn_buy.config(state=tk.NORMAL)
+        
+        # Limpar histórico
+        self.trades_view.clear()
+        
+        self.update_stats()
+        self.plot_candles()
+        self.sync_scrubber()
+        self.status_bar.config(text=f"Dados carregados: {len(self.df)} candles")
+        return True
+    
+    def update_frame(self, df_temp):
+        # Troca os candles mantendo os trades (set_data reseta; o feed só acrescenta candles)
+        self.df = self.prepare_frame(df_temp)
+        self.date_index = DateIndex.from_frame(self.df)
+        self.frame_cache.clear()
+        
+        # Arrays para as ordens de stop/alvo (sem passar pelo pandas a cada candle)
+        self.opens = self.df['Open'].to_numpy()
+        self.highs = self.df['High'].to_numpy()
+        self.lows = self.df['Low'].to_numpy()
+        self.scrubber.config(to=len(self.df))
+    
+    def append_bars(self, df_new):
+        # Candles novos no fim (feed): indicadores só numa cauda de 10x o aquecimento.
+        # SMA/Bollinger/RSI saem iguais ao cálculo completo; as EMAs (memória infinita)
+        # já convergiram nessa cauda (diferença relativa < 1e-9)
+        n_old = len(self.df)
+        context = min(n_old, 10 * indicators.warmup(self.sma_period, self.ema_period, self.bb_period,
+                                                    self.bb_std, self.rsi_period, self.extra_indicators))
+        close = pd.concat([self.df['Close'].iloc[n_old - context:].astype(float),
+                           df_new['Close'].astype(float)], ignore_index=True)
+        values = indicators.compute_all(
+            close,
+            sma_period=self.sma_period,
+            ema_period=self.ema_period,
+            bb_period=self.bb_period,
+            bb_std=self.bb_std,
+            rsi_period=self.rsi_period,
+            extra=self.extra_indicators,
+        )
+        
+        new = df_new.reset_index(drop=True)
+        for name, column in values.items():
+            new[name] = column.iloc[context:].to_numpy()
+        unit = self.df.attrs.get('date_unit')
+        if unit is not None:
+            # Modo compacto: Date inteira na mesma unidade, mesmos dtypes
+            new['Date'] = pd.DatetimeIndex(new['Date']).as_unit('ns').asi8 // UNIT_NS[unit]
+        new = new[self.df.columns].astype(self.df.dtypes.to_dict())
+        
+        df = pd.concat([self.df, new], ignore_index=True)
+        df.attrs = dict(self.df.attrs)
+        self.df = df
+        self.date_index = DateIndex.from_frame(self.df)
+        self.opens = self.df['Open'].to_numpy()
+        self.highs = self.df['High'].to_numpy()
+        self.lows = self.df['Low'].to_numpy()
+        self.scrubber.config(to=len(self.df))
+        
+        # Frames já desenhados só dependem dos candles até o seu índice e continuam
+        # valendo; o perfil de volume não (as faixas cobrem a série toda)
+        self.frame_cache.discard(lambda key: ('profile', True) in key[1])
+    
+    def prepare_frame(self, df):
+        # Indicadores (e modo compacto) sobre os dados brutos
+        self.df = df
+        self.calculate_indicators()
+        if self.compact:
+            self.df = datastore.compact(self.df)
+        return self.df
+    
+    def open_hit(self, symbol, date):
+        # Abre um sinal do scanner: ativo da base local, parado no candle do sinal
+        try:
+            df_temp = datastore.load(symbol)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao abrir {symbol}: {str(e)}")
             return
+        
+        self.ticker_entry.delete(0, tk.END)
+        self.ticker_entry.insert(0, symbol)
+        if not self.set_data(df_temp):
+            return
+        
+        self.seek(self.date_index.at_or_before(date) + 1)
+        self.update_stats()
+        self.status_bar.config(text=f"{symbol}: sinal em {pd.Timestamp(date).strftime('%d/%m/%Y')}")
+    
+    def open_scanner(self):
+        ScannerWindow(self)
+    
+    def run_monte_carlo(self):
+        if not self.trades_history:
+            messagebox.showwarning("Aviso", "Nenhum trade fechado para analisar")
+            return
+        
+        self.status_bar.config(text=f"Monte Carlo de {len(self.trades_history)} trades...")
+        self.root.update()
+        
+        text = montecarlo.analyze(self.trades_history, initial_capital=self.initial_capital)
+        self.status_bar.config(text="Monte Carlo concluído")
+        messagebox.showinfo("Monte Carlo", text)
+    
+    def indicator_flags(self):
+        return {name: getattr(self, f"show_{name}") for name in ("sma", "ema", "bb", "rsi", "macd", "volume", "vwap", "profile")}
 
-        # ===== Limpar figura =====
-        self.fig.clear()
-
-        # ===== Quantos subplots =====
-        rows = 1
-        if self.show_volume:
-            rows += 1
-        if self.show_rsi:
-            rows += 1
-        if self.show_macd:
-            rows += 1
-
-        # ===== Criar eixos =====
-        self.ax_price = self.fig.add_subplot(rows, 1, 1)
-        current_row = 2
-
-        if self.show_volume:
-            self.ax_volume = self.fig.add_subplot(rows, 1, current_row, sharex=self.ax_price)
-            current_row += 1
-
-        if self.show_rsi:
-            self.ax_rsi = self.fig.add_subplot(rows, 1, current_row, sharex=self.ax_price)
-            current_row += 1
-
-        if self.show_macd:
-            self.ax_macd = self.fig.add_subplot(rows, 1, current_row, sharex=self.ax_price)
-
-        # ===== Cor de fundo =====
-        bg = '#2b2b2b'
-
-        self.fig.patch.set_facecolor(bg)
-        self.ax_price.set_facecolor(bg)
-
-        if self.show_volume:
-            self.ax_volume.set_facecolor(bg)
-
-        if self.show_rsi:
-            self.ax_rsi.set_facecolor(bg)
-
-        if self.show_macd:
-            self.ax_macd.set_facecolor(bg)
+    def frame_args(self, index):
+        # Janela e marcações do frame que termina no candle index
+        # trocando pela linha de baixo, para controlar por + ou - 
+        start_idx = max(0, index - 50)
 
-        # ===== Ajuste das cores dos eixos =====
-        for ax in self.fig.axes:
-            ax.tick_params(colors='white')
-            ax.yaxis.label.set_color('white')
-            ax.xaxis.label.set_color('white')
-            ax.title.set_color('white')
-            ax.grid(True, alpha=0.2, color='gray')
+        #ficou feio assim, usando o anterior start_idx = max(0, index - self.window_size)
+        position = None
+        order_levels = None
+        if self.position:
+            position = (self.date_index.locate(self.position['entry_date']), self.position['entry_price'])
+            order_levels = (self.position['stop'], self.position['target'])
+        return start_idx, index, position, order_levels
 
+    def plot_candles(self, use_cache=True):
+        if self.df is None or len(self.df) == 0:
+            return
 
         # ===== Janela de candles =====
-        # trocando pela linha de baixo, para controlar por + ou - 
-        start_idx = max(0, self.current_index - 50)
+        start_idx, end_idx, position, order_levels = self.frame_args(self.current_index)
+        show = self.indicator_flags()
+        key = framecache.frame_key(end_idx, show, position, order_levels, self.chart_label(), self.fig)
+
+        # ===== Frame já renderizado: só blit =====
+        region = self.frame_cache.get(key) if use_cache else None
+        if region is not None:
+            if self.tooltip:
+                self.tooltip.set_visible(False)  # artista do frame anterior, não está no bitmap
+            self.canvas.restore_region(region)
+            self.canvas.blit(self.fig.bbox)
+            self.figure_stale = True
+            self.df_plot = self.df.iloc[start_idx:end_idx].reset_index(drop=True)
+            self.start_idx = start_idx
+            self.schedule_prefetch(end_idx)
+            return
 
-        #ficou feio assim, usando o anterior start_idx = max(0, self.current_index - self.window_size)
-        end_idx = self.current_index
-        df_slice = self.df.iloc[start_idx:end_idx].copy()
+        axes, df_slice = render.draw_frame(
+            self.fig, self.df, start_idx, end_idx, show,
+            self.chart_label(), position=position, orders=order_levels
+        )
+        self.ax_price = axes["price"]
+        self.ax_volume = axes.get("volume")
+        self.ax_rsi = axes.get("rsi")
+        self.ax_macd = axes.get("macd")
 
         if len(df_slice) == 0:
             return
 
-        x = range(len(df_slice))
-
-        # ===== Plotar candles =====
-        for i, (_, row) in enumerate(df_slice.iterrows()):
-            open_price = row['Open']
-            close_price = row['Close']
-            high_price = row['High']
-            low_price = row['Low']
-
-            color = '#00ff00' if close_price >= open_price else '#ff0000'
-            height = abs(close_price - open_price)
-            bottom = min(open_price, close_price)
-
-            self.ax_price.add_patch(
-                Rectangle((i - 0.3, bottom), 0.6, height,
-                          facecolor=color, edgecolor=color, alpha=0.8)
-            )
-
-            self.ax_price.plot([i, i], [low_price, high_price],
-                               color=color, linewidth=1)
-
-        # ===== Indicadores no preço =====
-        if self.show_sma:
-            self.ax_price.plot(x, df_slice["SMA"], color="yellow", linewidth=1, label="SMA")
-
-        if self.show_ema:
-            self.ax_price.plot(x, df_slice["EMA"], color="cyan", linewidth=1, label="EMA")
-
-        if self.show_bb:
-            self.ax_price.plot(x, df_slice["BB_UP"], color="gray", linestyle="--", linewidth=1)
-            self.ax_price.plot(x, df_slice["BB_DN"], color="gray", linestyle="--", linewidth=1)
-
-        # ===== Marcar compra =====
-        if self.position:
-            entry_date = self.position['entry_date']
-            if (df_slice['Date'] == entry_date).any():
-                entry_idx = df_slice[df_slice['Date'] == entry_date].index[0] - start_idx
-                entry_price = self.position['entry_price']
-                self.ax_price.plot(entry_idx, entry_price, 'g^', markersize=14)
-                self.ax_price.axhline(entry_price, color='green', linestyle='--', alpha=0.5)
-
-        # ===== Volume =====
-        if self.show_volume:
-            self.ax_volume.bar(x, df_slice["Volume"], alpha=0.3)
-            self.ax_volume.set_ylabel("Volume")
-
-        # ===== RSI =====
-        if self.show_rsi:
-            self.ax_rsi.plot(x, df_slice["RSI"], color="orange")
-            self.ax_rsi.axhline(70, color="red", linestyle="--")
-            self.ax_rsi.axhline(30, color="green", linestyle="--")
-            self.ax_rsi.set_ylim(0, 100)
-            self.ax_rsi.set_ylabel("RSI")
-
-        # ===== MACD =====
-        if self.show_macd:
-            self.ax_macd.plot(x, df_slice["MACD"], label="MACD")
-            self.ax_macd.plot(x, df_slice["MACD_SIGNAL"], label="Signal")
-            self.ax_macd.legend()
-
-        # ===== Estética =====
-        self.ax_price.set_xlim(-1, len(df_slice))
-        self.ax_price.grid(True, alpha=0.2)
-
-        current_date = df_slice.iloc[-1]['Date']
-        current_close = df_slice.iloc[-1]['Close']
-
-        self.ax_price.set_title(
-            f'{self.ticker_entry.get()} - {current_date.strftime("%d/%m/%Y")} '
-            f'- Fechamento: R$ {current_close:.2f}'
-        )
-
-        self.fig.tight_layout()
         self.canvas.draw()
+        self.frame_cache.put(key, self.canvas.copy_from_bbox(self.fig.bbox))
+        self.figure_stale = False
         
         # ===== Tooltip (recriado a cada redraw) =====
         self.tooltip = self.ax_price.annotate(
@@ -590,6 +671,47 @@ ATALHOS do ROOT.BIND
         # para o tooltip
         self.df_plot = df_slice.reset_index(drop=True)
         self.start_idx = start_idx
+        self.schedule_prefetch(end_idx)
+
+    def schedule_prefetch(self, index):
+        # Depois de mostrar um frame, pré-renderiza os seguintes na direção do movimento
+        direction = 1 if index >= self.last_frame_index else -1
+        self.last_frame_index = index
+        if self.prefetch_id:
+            self.root.after_cancel(self.prefetch_id)
+        self.prefetch_id = self.root.after(30, lambda: self.prefetch(index, direction))
+
+    def prefetch(self, index, direction, count=5):
+        # Um frame por chamada, para não travar a interface; reagenda até ter os próximos count
+        self.prefetch_id = None
+        if self.df is None:
+            return
+        
+        show = self.indicator_flags()
+        label = self.chart_label()
+        lowest = min(50, len(self.df))
+        for step in range(1, count + 1):
+            target = index + direction * step
+            if not lowest <= target <= len(self.df):
+                return
+            start_idx, end_idx, position, order_levels = self.frame_args(target)
+            key = framecache.frame_key(end_idx, show, position, order_levels, label, self.fig)
+            if key in self.frame_cache:
+                continue
+            
+            region = self.offscreen.render(self.fig, self.df, start_idx, end_idx, show, label,
+                                           position=position, orders=order_levels)
+            self.frame_cache.put(key, region)
+            self.prefetch_id = self.root.after(30, lambda: self.prefetch(index, direction, count))
+            return
+
+    def on_resize(self, event):
+        # Bitmaps do tamanho antigo não servem mais; redesenha o frame atual
+        self.frame_cache.clear()
+        self.plot_candles(use_cache=False)
+
+    def chart_label(self):
+        return self.ticker_entry.get()
 
     def toggle_play(self):
         if self.df is None:
@@ -620,8 +742,10 @@ ATALHOS do ROOT.BIND
         
         if self.current_index < len(self.df):
             self.current_index += 1
+            self.run_orders(self.current_index - 1, self.current_index)
             self.plot_candles()
             self.update_equity_curve()
+            self.sync_scrubber()
     
     def backward(self):
         if self.df is None:
@@ -630,6 +754,94 @@ ATALHOS do ROOT.BIND
         if self.current_index > 50:
             self.current_index -= 1
             self.plot_candles()
+            self.sync_scrubber()
+    
+    def seek(self, index):
+        # Salto direto para um candle; contabilidade dos candles pulados em lote
+        if self.df is None:
+            return
+        
+        index = max(1, min(int(index), len(self.df)))
+        if index == self.current_index:
+            return
+        
+        if index > self.current_index:
+            self.run_orders(self.current_index, index, record_equity=True)
+        
+        self.current_index = index
+        self.plot_candles()
+        self.update_stats()
+        self.sync_scrubber()
+    
+    def goto_date(self):
+        if self.df is None:
+            return
+        
+        try:
+            date = parse_date(self.goto_entry.get())
+        except ValueError:
+            messagebox.showwarning("Aviso", "Data inválida")
+            return
+        
+        bar = self.date_index.at_or_before(date)
+        if bar < 0:
+            messagebox.showwarning("Aviso", "Data anterior ao início dos dados")
+            return
+        self.seek(bar + 1)
+    
+    def signal_mask(self, expr):
+        # Regra avaliada uma vez no histórico inteiro; reaproveitada até trocar regra ou dados
+        if self.signal_cache and self.signal_cache[0] is self.df and self.signal_cache[1] == expr:
+            return self.signal_cache[2]
+        
+        code = compile_rule(expr)
+        columns = {c: self.df[c].to_numpy(dtype=float) for c in self.df.columns if c != 'Date'}
+        mask = np.broadcast_to(evaluate_rule(code, columns), len(self.df)).copy()
+        mask[:indicators.warmup(self.sma_period, self.ema_period, self.bb_period, self.bb_std,
+                                self.rsi_period, self.extra_indicators)] = False  # aquecimento dos indicadores
+        self.signal_cache = (self.df, expr, mask)
+        return mask
+    
+    def next_signal(self):
+        # Pula direto para o próximo sinal: um único redraw, contabilidade em lote no seek
+        if self.df is None:
+            return
+        
+        expr = self.signal_entry.get().strip()
+        try:
+            mask = self.signal_mask(expr)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Regra inválida: {str(e)}")
+            return
+        
+        # Candle current_index é o próximo ainda não revelado
+        hits = np.flatnonzero(mask[self.current_index:])
+        if len(hits) == 0:
+            self.status_bar.config(text=f"Nenhum sinal à frente para: {expr}")
+            return
+        
+        bar = self.current_index + int(hits[0])
+        self.seek(bar + 1)
+        self.status_bar.config(
+            text=f"Sinal em {self.date_index.timestamp(bar).strftime('%d/%m/%Y')}: {expr}"
+        )
+    
+    def on_scrub(self, value):
+        # Arrastar a barra dispara muitos eventos: só o último vira seek
+        if self.scrub_id:
+            self.root.after_cancel(self.scrub_id)
+        self.scrub_id = self.root.after(30, lambda: self._apply_scrub(int(value)))
+    
+    def _apply_scrub(self, index):
+        self.scrub_id = None
+        if index != self.current_index:
+            self.seek(index)
+    
+    def sync_scrubber(self):
+        if self.scrub_id:
+            self.root.after_cancel(self.scrub_id)
+            self.scrub_id = None
+        self.scrubber.set(self.current_index)
     
     def update_speed(self, value):
         self.speed = int(value)
@@ -643,18 +855,22 @@ ATALHOS do ROOT.BIND
             return
         
         current_row = self.df.iloc[self.current_index - 1]
-        entry_price = current_row['Close']
+        entry_price = float(current_row['Close'])
         shares = int(self.capital / entry_price)
         
         if shares == 0:
             messagebox.showwarning("Aviso", "Capital insuficiente para comprar")
             return
         
+        stop, target = orders.levels(entry_price, *self.order_pcts())
         self.position = {
             'shares': shares,
             'entry_price': entry_price,
-            'entry_date': current_row['Date']
+            'entry_date': self.date_index.timestamp(self.current_index - 1),
+            'stop': stop,
+            'target': target
         }
+        self.frame_cache.clear()
         
         self.btn_buy.config(state=tk.DISABLED)
         self.btn_sell.config(state=tk.NORMAL)
@@ -668,8 +884,12 @@ ATALHOS do ROOT.BIND
             return
         
         current_row = self.df.iloc[self.current_index - 1]
-        exit_price = current_row['Close']
+        exit_price = float(current_row['Close'])
         
+        self.close_position(self.current_index - 1, exit_price, 'Venda')
+        self.plot_candles()
+    
+    def close_position(self, exit_bar, exit_price, label):
         # Calcular resultado
         entry_value = self.position['shares'] * self.position['entry_price']
         exit_value = self.position['shares'] * exit_price
@@ -681,7 +901,7 @@ ATALHOS do ROOT.BIND
         # Registrar trade
         trade = {
             'entry_date': self.position['entry_date'],
-            'exit_date': current_row['Date'],
+            'exit_date': self.date_index.timestamp(exit_bar),
             'entry_price': self.position['entry_price'],
             'exit_price': exit_price,
             'shares': self.position['shares'],
@@ -691,39 +911,62 @@ ATALHOS do ROOT.BIND
         
         self.trades_history.append(trade)
         
-        # Adicionar ao treeview
-        tag = 'win' if profit > 0 else 'loss'
-        self.trades_tree.insert('', 0, values=(
-            current_row['Date'].strftime('%d/%m/%y'),
-            'Venda',
-            f'{exit_price:.2f}',
-            f'{profit_pct:+.2f}%'
-        ), tags=(tag,))
-        
-        self.trades_tree.tag_configure('win', foreground='#00ff00')
-        self.trades_tree.tag_configure('loss', foreground='#ff0000')
+        # Adicionar à lista de trades
+        self.trades_view.append(trade, label=label)
         
         self.position = None
+        self.frame_cache.clear()
         self.btn_sell.config(state=tk.DISABLED)
         self.btn_buy.config(state=tk.NORMAL)
         
         self.update_stats()
-        self.plot_candles()
-        self.status_bar.config(text=f"Venda: R$ {exit_price:.2f} | "
+        self.status_bar.config(text=f"{label}: R$ {exit_price:.2f} | "
                               f"Lucro: R$ {profit:.2f} ({profit_pct:+.2f}%)")
     
+    def order_pcts(self):
+        # Stop/alvo em % digitados na barra de controles (vazio = sem ordem)
+        def pct(entry):
+            try:
+                return abs(float(entry.get().replace(",", ".")))
+            except ValueError:
+                return None
+        return pct(self.stop_entry), pct(self.target_entry)
+    
+    def run_orders(self, start, end, record_equity=False):
+        # Stop/alvo nos candles [start, end): O(1) num passo, vetorizado num salto
+        hit = None
+        if self.position:
+            hit = orders.first_trigger(self.opens, self.highs, self.lows, start, end,
+                                       self.position['stop'], self.position['target'])
+        
+        if record_equity:
+            self.record_equity_range(start, hit[0] if hit else end)
+        
+        if hit:
+            self.close_position(*hit)
+    
     def update_equity_curve(self):
         if self.position and self.current_index > 0:
-            current_price = self.df.iloc[self.current_index - 1]['Close']
+            current_price = float(self.df.iloc[self.current_index - 1]['Close'])
             current_value = self.capital + (self.position['shares'] * current_price)
             self.equity_curve.append(current_value)
     
-    def update_stats(self):
+    def current_equity(self):
         # Capital atual (incluindo posição aberta)
         current_capital = self.capital
         if self.position and self.current_index > 0:
-            current_price = self.df.iloc[self.current_index - 1]['Close']
+            current_price = float(self.df.iloc[self.current_index - 1]['Close'])
             current_capital += self.position['shares'] * current_price
+        return current_capital
+
+    def record_equity_range(self, start, end):
+        # Equivalente a update_equity_curve para cada candle em (start, end], de uma vez
+        if self.position and end > start:
+            closes = self.df['Close'].to_numpy(dtype=float)[start:end]
+            self.equity_curve.extend(self.capital + self.position['shares'] * closes)
+    
+    def update_stats(self):
+        current_capital = self.current_equity()
         
         returns = ((current_capital - self.initial_capital) / self.initial_capital) * 100
         
@@ -766,6 +1009,25 @@ ATALHOS do ROOT.BIND
             self.stat_labels["Maior Perda:"].config(text=f"{max_loss:+.2f}%", fg='#ff0000')
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulador de Swing Trade")
+    parser.add_argument("--gravar", metavar="ARQUIVO", default=None,
+                        help="grava a sessão para repetir depois com session.py")
+    parser.add_argument("--feed", metavar="PORTA", type=int, default=None,
+                        help="segue o relógio do servidor de replay (feedserver.py)")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = SwingTradeSimulator(root)
-    root.mainloop()
+    if args.gravar:
+        import session
+        recorder = session.SessionRecorder(args.gravar)
+        app = recorder.wrap(SwingTradeSimulator)(root)
+        root.mainloop()
+        recorder.close(app)
+    else:
+        app = SwingTradeSimulator(root)
+        if args.feed:
+            import feedserver
+            feedserver.follow(app, feedserver.FeedClient(args.feed))
+        root.mainloop()
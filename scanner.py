@@ -0,0 +1,249 @@
+'''
+Scanner de setups em um universo de ativos da base local (datastore).
+
+Carrega todos os ativos, calcula os mesmos indicadores do simulador (cada
+ativo nas suas próprias datas, como no replay) e avalia regras como:
+    RSI < 30 and Close < BB_DN
+    cross_above(MACD, MACD_SIGNAL) and Close > SMA
+
+Uso pela linha de comando:
+    python scanner.py "RSI < 30 and Close < BB_DN" --inicio 2015-01-01
+
+No simulador, o botão "Scanner" abre a janela de busca; duplo clique em um
+resultado abre o ativo no replay parado no candle do sinal.
+'''
+import ast
+import argparse
+import numpy as np
+import pandas as pd
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+import datastore
+import indicators
+
+
+# ===== Funções disponíveis nas regras =====
+def prev(a, n=1):
+    a = np.asarray(a, dtype=float)
+    if a.ndim == 0 or n == 0:
+        return a
+    out = np.full_like(a, np.nan)
+    out[n:] = a[:-n]
+    return out
+
+
+def cross_above(a, b):
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    return (a > b) & (prev(a) <= prev(b))
+
+
+def cross_below(a, b):
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    return (a < b) & (prev(a) >= prev(b))
+
+
+RULE_FUNCTIONS = {
+    'prev': prev,
+    'cross_above': cross_above,
+    'cross_below': cross_below,
+    'abs': np.abs,
+    '_and': np.logical_and,
+    '_or': np.logical_or,
+    '_not': np.logical_not,
+}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Compare, ast.Lt, ast.LtE,
+    ast.Gt, ast.GtE, ast.Eq, ast.NotEq, ast.Call, ast.Name, ast.Load, ast.Constant,
+)
+
+
+class _RuleTransformer(ast.NodeTransformer):
+    # "and"/"or"/"not" do Python não funcionam com arrays: vira logical_and/or/not
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        func = '_and' if isinstance(node.op, ast.And) else '_or'
+        expr = node.values[0]
+        for value in node.values[1:]:
+            expr = ast.Call(func=ast.Name(id=func, ctx=ast.Load()), args=[expr, value], keywords=[])
+        return expr
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.Call(func=ast.Name(id='_not', ctx=ast.Load()), args=[node.operand], keywords=[])
+        return node
+
+    def visit_Compare(self, node):
+        # a < b < c  ->  (a < b) and (b < c)
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        parts = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            parts.append(ast.Compare(left=left, ops=[op], comparators=[right]))
+            left = right
+        return self.visit_BoolOp(ast.BoolOp(op=ast.And(), values=parts))
+
+
+def compile_rule(expr):
+    tree = ast.parse(expr, mode='eval')
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Expressão não permitida na regra: {type(node).__name__}")
+        if isinstance(node, ast.Call) and not isinstance(node.func, ast.Name):
+            raise ValueError("Só funções simples são permitidas na regra")
+        if isinstance(node, ast.Name) and node.id.startswith('_'):
+            raise ValueError(f"Nome não permitido na regra: {node.id}")
+    tree = ast.fix_missing_locations(_RuleTransformer().visit(tree))
+    return compile(tree, '<regra>', 'eval')
+
+
+def evaluate_rule(expr, columns):
+    # columns: {"Close": array, "RSI": array, ...} (1-D para um ativo, 2-D para o universo)
+    code = compile_rule(expr) if isinstance(expr, str) else expr
+    namespace = dict(RULE_FUNCTIONS)
+    namespace.update(columns)
+    with np.errstate(invalid='ignore'):
+        result = eval(code, {'__builtins__': {}}, namespace)
+    return np.asarray(result, dtype=bool)
+
+
+class UniverseScanner:
+    def __init__(self, dates, symbols, arrays, **periods):
+        self.dates = dates
+        self.symbols = symbols
+
+        # Cada ativo nas suas próprias datas, alinhado pelo próprio candle (linha k =
+        # k-ésimo candle do ativo, NaN depois do último). Na união das datas, os dias
+        # em que o ativo não negociou são NaN: as janelas dos indicadores e o prev()/
+        # cross_above() atravessando esses buracos perderiam valores e sinais.
+        close = arrays['Close']
+        own_rows = [np.flatnonzero(~np.isnan(close[:, j])) for j in range(close.shape[1])]
+        n_rows = max((len(rows) for rows in own_rows), default=0)
+        self.date_row = np.full((n_rows, len(own_rows)), -1, dtype=np.int64)  # linha na união das datas
+        for j, rows in enumerate(own_rows):
+            self.date_row[:len(rows), j] = rows
+
+        valid = self.date_row >= 0
+        self.columns = {}
+        for name, values in arrays.items():
+            packed = np.full(self.date_row.shape, np.nan)
+            packed[valid] = values[self.date_row[valid], np.nonzero(valid)[1]]
+            self.columns[name] = packed
+
+        self.warmup = indicators.warmup(**periods)
+        self.ready = valid.copy()  # candle do ativo já passou do aquecimento
+        self.ready[:self.warmup] = False
+        for j, rows in enumerate(own_rows):
+            values = indicators.compute_all(pd.Series(self.columns['Close'][:len(rows), j]), **periods)
+            for name, column in values.items():
+                if name not in self.columns:
+                    self.columns[name] = np.full(self.date_row.shape, np.nan)
+                self.columns[name][:len(rows), j] = column.to_numpy()
+
+    @classmethod
+    def load(cls, symbols=None, start=None, end=None, data_dir=datastore.DATA_DIR, **periods):
+        dates, symbols, arrays = datastore.load_universe(symbols, start, end, data_dir=data_dir)
+        return cls(dates, symbols, arrays, **periods)
+
+    def scan(self, expr):
+        mask = evaluate_rule(expr, self.columns)
+        mask = np.broadcast_to(mask, self.columns['Close'].shape) & self.ready
+        rows, cols = np.nonzero(mask)
+
+        hits = pd.DataFrame({
+            'Date': self.dates[self.date_row[rows, cols]],
+            'Symbol': np.asarray(self.symbols, dtype=object)[cols],
+            'Close': self.columns['Close'][rows, cols],
+            'RSI': self.columns['RSI'][rows, cols],
+        })
+        return hits.sort_values(['Date', 'Symbol'], ascending=[False, True], ignore_index=True)
+
+
+class ScannerWindow(tk.Toplevel):
+    MAX_ROWS = 5000
+
+    def __init__(self, app):
+        super().__init__(app.root, bg='#2b2b2b')
+        self.app = app
+        self.scanner = None
+        self.hits = None
+        self.title("Scanner")
+        self.geometry("520x600")
+
+        top = tk.Frame(self, bg='#2b2b2b', pady=5)
+        top.pack(side=tk.TOP, fill=tk.X)
+
+        tk.Label(top, text="Regra:", bg='#2b2b2b', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
+        self.rule_entry = tk.Entry(top, width=35, font=('Arial', 10))
+        self.rule_entry.insert(0, "RSI < 30 and Close < BB_DN")
+        self.rule_entry.pack(side=tk.LEFT, padx=5)
+        self.rule_entry.bind("<Return>", lambda e: self.run_scan())
+
+        tk.Button(top, text="Escanear", command=self.run_scan,
+                  bg='#4a4a4a', fg='white', font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
+
+        self.status = tk.Label(self, text=f"{len(datastore.list_symbols())} ativos na base local",
+                               bg='#3a3a3a', fg='white', anchor=tk.W, font=('Arial', 9))
+        self.status.pack(side=tk.BOTTOM, fill=tk.X)
+
+        self.listbox = tk.Listbox(self, bg='#1e1e1e', fg='white', font=('Courier', 9),
+                                  selectbackground='#4a4a4a')
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.listbox.yview)
+        self.listbox.configure(yscrollcommand=scrollbar.set)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.bind("<Double-Button-1>", self.open_selected)
+
+    def run_scan(self):
+        try:
+            if self.scanner is None:
+                self.status.config(text="Carregando base local...")
+                self.update()
+                self.scanner = UniverseScanner.load(
+                    sma_period=self.app.sma_period,
+                    ema_period=self.app.ema_period,
+                    bb_period=self.app.bb_period,
+                    bb_std=self.app.bb_std,
+                    rsi_period=self.app.rsi_period,
+                    extra=self.app.extra_indicators,
+                )
+
+            self.hits = self.scanner.scan(self.rule_entry.get())
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro no scanner: {str(e)}", parent=self)
+            return
+
+        # Lista só os mais recentes para não travar a janela com milhões de sinais
+        lines = [
+            f"{row.Date.strftime('%d/%m/%Y')}  {row.Symbol:<12} {row.Close:>10.2f}  RSI {row.RSI:5.1f}"
+            for row in self.hits.head(self.MAX_ROWS).itertuples()
+        ]
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *lines)
+        self.status.config(text=f"{len(self.hits)} sinais em {len(self.scanner.symbols)} ativos")
+
+    def open_selected(self, event=None):
+        selection = self.listbox.curselection()
+        if not selection or self.hits is None:
+            return
+        hit = self.hits.iloc[selection[0]]
+        self.app.open_hit(hit['Symbol'], hit['Date'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scanner de setups na base local")
+    parser.add_argument("regra")
+    parser.add_argument("--inicio", default=None)
+    parser.add_argument("--fim", default=None)
+    parser.add_argument("--ativos", nargs="*", default=None)
+    args = parser.parse_args()
+
+    scanner = UniverseScanner.load(args.ativos, args.inicio, args.fim)
+    hits = scanner.scan(args.regra)
+    print(hits.to_string(index=False))
+    print(f"\n{len(hits)} sinais em {len(scanner.symbols)} ativos")
@@ -0,0 +1,308 @@
+'''
+Gravação e repetição de sessões do simulador (para reproduzir lentidão).
+
+Gravar: abrir o simulador com
+    python replaytrade.py --gravar sessao.rec.gz
+
+Cada ação do usuário (carregar dados, avançar/voltar, saltos, compra/venda,
+atalhos 1-6, +/-, tooltip com Ctrl) vira uma linha com o instante, a
+duração original, o candle atual e os argumentos. Ao fechar a janela o
+resultado final (capital e trades) é gravado junto.
+
+Repetir sem tela, o mais rápido possível:
+    python session.py sessao.rec.gz
+
+Mostra a latência por tipo de ação (original x repetição) e confere se o
+capital e os trades finais batem com os gravados (código de saída 1 se não).
+
+Os dados não vão no arquivo: a repetição lê o mesmo ativo/período da base
+local (datastore) ou baixa de novo, e confere o número de candles.
+'''
+import sys
+import gzip
+import json
+import time
+import argparse
+import functools
+from types import SimpleNamespace
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import datastore
+from replaytrade import SwingTradeSimulator
+from tradelist import TradeStore
+
+VERSION = 1
+
+# Métodos do simulador que correspondem a ações do usuário
+RECORDED = ('set_data', 'forward', 'backward', 'seek', 'buy', 'sell',
+            'toggle_indicator', 'zoom_in', 'zoom_out', 'on_mouse_move')
+
+
+def data_meta(app, df):
+    dates = pd.DatetimeIndex(df['Date'])
+    return {
+        'symbol': app.chart_label(),
+        'start': dates[0].isoformat(),
+        'end': (dates[-1] + pd.Timedelta(days=1)).isoformat(),  # fim exclusivo (datastore.load)
+        'bars': len(df),
+        'compact': bool(app.compact),
+    }
+
+
+def result_of(app):
+    return {
+        'capital': app.current_equity(),
+        'bar': app.current_index,
+        'profits': [round(float(t['profit']), 6) for t in app.trades_history],
+    }
+
+
+class SessionRecorder:
+    def __init__(self, path):
+        self.path = path
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+        self.t0 = time.perf_counter()
+        self.depth = 0
+        self._write({'version': VERSION, 'started': pd.Timestamp.now().isoformat()})
+
+    def _write(self, item):
+        self.file.write(json.dumps(item, separators=(',', ':')) + '\n')
+
+    def args_for(self, app, name, args):
+        # Argumentos que a repetição precisa para refazer a ação (None = não grava)
+        if name == 'set_data':
+            return [data_meta(app, args[0])]
+        if name == 'seek':
+            return [int(args[0])]
+        if name == 'toggle_indicator':
+            return [args[0]]
+        if name == 'buy':
+            return list(app.order_pcts())
+        if name == 'on_mouse_move':
+            event = args[0]
+            if event.key != 'control' or event.xdata is None:
+                return None  # sem Ctrl o tooltip só some: não vale a pena gravar
+            return [int(round(event.xdata))]
+        return []  # forward, backward, sell, zoom (o evento do Tk não interessa)
+
+    def wrap(self, cls):
+        # Subclasse com os métodos de ação instrumentados. Precisa ser a classe
+        # instanciada, porque botões/atalhos guardam os métodos no setup_ui.
+        recorder = self
+
+        def instrument(name):
+            method = getattr(cls, name)
+
+            @functools.wraps(method)
+            def wrapper(app, *args, **kwargs):
+                # Só a ação de fora é gravada (goto_date -> seek, animate -> forward...)
+                if recorder.depth:
+                    return method(app, *args, **kwargs)
+                recorded_args = recorder.args_for(app, name, args)
+                bar = app.current_index
+                recorder.depth += 1
+                start = time.perf_counter()
+                try:
+                    return method(app, *args, **kwargs)
+                finally:
+                    end = time.perf_counter()
+                    recorder.depth -= 1
+                    if recorded_args is not None:
+                        action = 'hover' if name == 'on_mouse_move' else name
+                        recorder._write([round(start - recorder.t0, 4), round((end - start) * 1000, 2),
+                                         bar, action, *recorded_args])
+            return wrapper
+
+        return type('Recorded' + cls.__name__, (cls,), {name: instrument(name) for name in RECORDED})
+
+    def close(self, app):
+        self._write({'result': result_of(app)})
+        self.file.close()
+
+
+def read_session(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    header = lines[0]
+    if header.get('version') != VERSION:
+        raise ValueError(f"Versão de sessão não suportada: {header.get('version')}")
+    actions = [line for line in lines[1:] if isinstance(line, list)]
+    result = next((line['result'] for line in lines[1:] if isinstance(line, dict) and 'result' in line), None)
+    return header, actions, result
+
+
+class _Widget:
+    # Substituto sem tela para os widgets do Tk usados pelo simulador
+    def __init__(self, text=''):
+        self.text = text
+
+    def config(self, **kwargs):
+        self.text = kwargs.get('text', self.text)
+
+    configure = config
+
+    def get(self):
+        return self.text
+
+    def set(self, value):
+        self.text = value
+
+    def delete(self, *args):
+        self.text = ''
+
+    def insert(self, index, value):
+        self.text = value
+
+
+class _Root:
+    def title(self, *args):
+        pass
+
+    def geometry(self, *args):
+        pass
+
+    def bind(self, *args):
+        pass
+
+    def after(self, ms, func):
+        return None
+
+    def after_cancel(self, ident):
+        pass
+
+    def update(self):
+        pass
+
+
+class HeadlessSimulator(SwingTradeSimulator):
+    # Mesmo simulador, com figura Agg e widgets falsos (sem Tk/tela)
+    def __init__(self):
+        self.pcts = (None, None)
+        super().__init__(_Root())
+
+    def setup_ui(self):
+        self.fig = Figure(figsize=(10, 8), facecolor='#1e1e1e')
+        self.ax = self.fig.add_subplot(111, facecolor='#2b2b2b')
+        self.canvas = FigureCanvasAgg(self.fig)
+
+        for name in ('ticker_entry', 'date_entry', 'goto_entry', 'signal_entry', 'stop_entry',
+                     'target_entry', 'btn_buy', 'btn_sell', 'btn_play', 'btn_backward', 'btn_forward',
+                     'scrubber', 'status_bar'):
+            setattr(self, name, _Widget())
+        self.scrub_id = None
+        self.stat_labels = defaultdict(_Widget)
+        self.trades_view = TradeStore()
+
+    def order_pcts(self):
+        return self.pcts
+
+
+def load_frame(meta):
+    symbol, start, end = meta['symbol'], meta['start'], meta['end']
+    if datastore.has_symbol(symbol):
+        df = datastore.load(symbol, start, end)
+    else:
+        df = datastore.download(symbol, start, end)
+    if len(df) != meta['bars']:
+        raise ValueError(f"{symbol}: {len(df)} candles na base, {meta['bars']} na gravação")
+    return df
+
+
+def play(actions, progress=None):
+    # Repete as ações em sequência; devolve o simulador e [(ação, ms original, ms agora)]
+    app = HeadlessSimulator()
+    frames = {}
+    timings = []
+
+    for k, (t, recorded_ms, bar, action, *args) in enumerate(actions):
+        if action != 'set_data' and app.current_index != bar:
+            raise RuntimeError(f"Ação {k} ({action}): candle {app.current_index}, gravado {bar}")
+
+        if action == 'set_data':
+            meta = args[0]
+            key = (meta['symbol'], meta['start'], meta['end'])
+            if key not in frames:
+                frames[key] = load_frame(meta)
+            app.compact = meta['compact']
+            call = functools.partial(app.set_data, frames[key].copy())
+        elif action == 'buy':
+            app.pcts = tuple(args)
+            call = app.buy
+        elif action == 'hover':
+            event = SimpleNamespace(key='control', inaxes=app.ax_price, xdata=float(args[0]))
+            call = functools.partial(app.on_mouse_move, event)
+        else:
+            call = functools.partial(getattr(app, action), *args)
+
+        start = time.perf_counter()
+        call()
+        timings.append((action, recorded_ms, (time.perf_counter() - start) * 1000))
+
+        if progress and k % 100 == 0:
+            progress(k, len(actions))
+
+    return app, timings
+
+
+def latency_table(timings):
+    by_action = defaultdict(lambda: ([], []))
+    for action, recorded_ms, replay_ms in timings:
+        by_action[action][0].append(recorded_ms)
+        by_action[action][1].append(replay_ms)
+
+    lines = [f"{'ação':<18}{'n':>6}{'gravado p50':>13}{'p95':>9}{'repetição p50':>15}{'p95':>9}{'máx':>9}"]
+    for action, (recorded, replay) in sorted(by_action.items(), key=lambda item: -sum(item[1][1])):
+        rec_p50, rec_p95 = np.percentile(recorded, [50, 95])
+        p50, p95 = np.percentile(replay, [50, 95])
+        lines.append(f"{action:<18}{len(replay):>6}{rec_p50:>13.1f}{rec_p95:>9.1f}"
+                     f"{p50:>15.1f}{p95:>9.1f}{max(replay):>9.1f}")
+    total = sum(t[2] for t in timings)
+    lines.append(f"total: {len(timings)} ações em {total / 1000:.2f}s (ms por ação)")
+    return "\n".join(lines)
+
+
+def compare_result(app, expected):
+    # Lista de divergências entre o fim da repetição e o gravado (vazia = ok)
+    got = result_of(app)
+    problems = []
+    if got['bar'] != expected['bar']:
+        problems.append(f"candle final {got['bar']} != {expected['bar']}")
+    if not np.isclose(got['capital'], expected['capital']):
+        problems.append(f"capital R$ {got['capital']:,.2f} != R$ {expected['capital']:,.2f}")
+    if len(got['profits']) != len(expected['profits']):
+        problems.append(f"{len(got['profits'])} trades != {len(expected['profits'])}")
+    elif not np.allclose(got['profits'], expected['profits']):
+        problems.append("lucro dos trades diferente do gravado")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repete uma sessão gravada sem tela e mede a latência")
+    parser.add_argument("arquivo")
+    args = parser.parse_args()
+
+    header, actions, expected = read_session(args.arquivo)
+    print(f"Sessão de {header['started']}: {len(actions)} ações")
+
+    app, timings = play(actions, progress=lambda k, n: print(f"  {k}/{n}", end="\r"))
+    print(latency_table(timings))
+
+    if expected is None:
+        print("Gravação sem resultado final (janela não foi fechada?): nada a conferir")
+        return 0
+
+    problems = compare_result(app, expected)
+    if problems:
+        print("DIVERGÊNCIA: " + "; ".join(problems))
+        return 1
+    print(f"Resultado confere: R$ {expected['capital']:,.2f}, {len(expected['profits'])} trades")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+'''
+Modo compacto (datastore.compact): a mesma sequência de trades em float64 e
+em float32/int tem que mostrar os mesmos preços (:.2f) e o mesmo resultado.
+
+Tolerância do P&L: 1 centavo por trade e no capital final. Os preços são
+guardados em float32 (erro relativo < 6e-8), mas as contas dos trades são
+feitas em float64 sobre esses preços.
+
+    python -m pytest -q test_compact.py
+'''
+import numpy as np
+import pandas as pd
+import pytest
+
+import datastore
+from session import HeadlessSimulator
+
+CENT = 0.01
+
+
+def make_frame(n=600, seed=7):
+    # Preços com 2 casas, como na base (CSV/yfinance arredondados)
+    rng = np.random.default_rng(seed)
+    close = np.round(30 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 2)
+    open_ = np.round(close * (1 + rng.normal(0, 0.005, n)), 2)
+    return pd.DataFrame({
+        'Date': pd.bdate_range('2015-01-01', periods=n),
+        'Open': open_,
+        'High': np.round(np.maximum(open_, close) * 1.01, 2),
+        'Low': np.round(np.minimum(open_, close) * 0.99, 2),
+        'Close': close,
+        'Volume': rng.integers(10**5, 10**7, n).astype(float),
+    })
+
+
+def run_session(df, compact):
+    # Compras/vendas manuais, stop/alvo e saltos: devolve o simulador e o que foi exibido
+    app = HeadlessSimulator()
+    app.compact = compact
+    app.set_data(df.copy())
+    shown = []
+
+    def record():
+        shown.append(app.ax_price.get_title())
+        shown.append(app.status_bar.text)
+
+    for k, bar in enumerate(range(60, 560, 40)):
+        app.seek(bar)
+        app.pcts = (3.0, 5.0) if k % 2 else (None, None)
+        app.buy()
+        record()
+        for _ in range(6):
+            app.forward()
+            record()
+        app.sell()
+        record()
+    return app, shown
+
+
+@pytest.fixture(scope="module")
+def sessions():
+    df = make_frame()
+    return run_session(df, compact=False), run_session(df, compact=True)
+
+
+def test_compact_halves_price_storage():
+    df = make_frame()
+    full = HeadlessSimulator()
+    full.set_data(df.copy())
+    small = HeadlessSimulator()
+    small.compact = True
+    small.set_data(df.copy())
+    assert small.df['Close'].dtype == np.float32
+    assert small.df.memory_usage(deep=True).sum() < 0.6 * full.df.memory_usage(deep=True).sum()
+
+
+def test_displayed_prices_are_identical():
+    df = make_frame()
+    small = datastore.compact(df)
+    for col in ('Open', 'High', 'Low', 'Close'):
+        assert [f"{v:.2f}" for v in df[col]] == [f"{v:.2f}" for v in small[col]]
+
+
+def test_session_display_is_identical(sessions):
+    (_, shown_full), (_, shown_small) = sessions
+    assert shown_full == shown_small
+
+
+def test_trades_and_capital_within_tolerance(sessions):
+    (full, _), (small, _) = sessions
+    assert len(full.trades_history) == len(small.trades_history) > 10
+
+    for a, b in zip(full.trades_history, small.trades_history):
+        assert a['entry_date'] == b['entry_date']
+        assert a['exit_date'] == b['exit_date']
+        assert a['shares'] == b['shares']
+        assert f"{a['entry_price']:.2f}" == f"{b['entry_price']:.2f}"
+        assert f"{a['exit_price']:.2f}" == f"{b['exit_price']:.2f}"
+        assert abs(a['profit'] - b['profit']) < CENT
+
+    assert abs(full.capital - small.capital) < CENT
+    assert len(full.equity_curve) == len(small.equity_curve)
+    np.testing.assert_allclose(full.equity_curve, small.equity_curve, atol=CENT)
@@ -0,0 +1,42 @@
+'''
+Datas digitadas no "Ir para data": ISO (formato do campo "Data Início") e dd/mm/aaaa.
+
+    python -m pytest -q test_dateindex.py
+'''
+import numpy as np
+import pandas as pd
+import pytest
+
+from dateindex import parse_date
+from session import HeadlessSimulator
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2016-03-05", "2016-03-05"),
+    ("2023-01-05", "2023-01-05"),
+    ("2023-12-31", "2023-12-31"),
+    ("05/03/2016", "2016-03-05"),
+    ("05/01/2023", "2023-01-05"),
+    (" 31/12/2023 ", "2023-12-31"),
+])
+def test_parse_date_both_styles(text, expected):
+    assert parse_date(text) == pd.Timestamp(expected)
+
+
+@pytest.mark.parametrize("text", ["", "2023-13-01", "31/02/2023", "amanhã"])
+def test_parse_date_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        parse_date(text)
+
+
+@pytest.mark.parametrize("text", ["2016-03-07", "07/03/2016"])
+def test_goto_date_lands_on_the_typed_day(text):
+    dates = pd.bdate_range('2015-01-01', periods=600)
+    close = np.linspace(10, 20, len(dates))
+    df = pd.DataFrame({'Date': dates, 'Open': close, 'High': close, 'Low': close, 'Close': close,
+                       'Volume': np.full(len(dates), 1000.0)})
+    app = HeadlessSimulator()
+    app.set_data(df)
+    app.goto_entry.insert(0, text)
+    app.goto_date()
+    assert app.date_index.timestamp(app.current_index - 1) == pd.Timestamp("2016-03-07")
@@ -0,0 +1,74 @@
+'''
+Frames do cache (blit): tooltip e artistas da figura são de outro frame, então
+nada pode chamar draw_idle em cima do bitmap sem redesenhar de verdade.
+
+    python -m pytest -q test_framecache.py
+'''
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+import framecache
+from session import HeadlessSimulator
+
+
+def cached_frame_app():
+    n = 200
+    close = np.linspace(10, 20, n)
+    df = pd.DataFrame({'Date': pd.bdate_range('2015-01-01', periods=n), 'Open': close,
+                       'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                       'Volume': np.full(n, 1000.0)})
+    app = HeadlessSimulator()
+    app.set_data(df)
+    app.forward()
+    return app
+
+
+def mouse(app, key):
+    return SimpleNamespace(key=key, inaxes=app.ax_price, xdata=10.0)
+
+
+def test_cache_hit_hides_tooltip():
+    app = cached_frame_app()
+    app.on_mouse_move(mouse(app, "control"))
+    assert app.tooltip.get_visible()
+
+    app.backward()  # frame 50 já renderizado: blit
+    assert app.figure_stale
+    assert not app.tooltip.get_visible()
+
+
+def test_hiding_tooltip_on_cached_frame_redraws_current_frame():
+    app = cached_frame_app()
+    app.backward()
+    assert app.figure_stale
+    app.tooltip.set_visible(True)
+
+    app.on_mouse_move(mouse(app, None))
+    assert not app.figure_stale
+    assert not app.tooltip.get_visible()
+    assert app.df_plot['Close'].iloc[-1] == app.df['Close'].iloc[app.current_index - 1]
+
+
+class Region:
+    # Só o que o FrameCache usa de um BufferRegion
+    def get_extents(self):
+        return 0, 0, 100, 100  # 40000 bytes
+
+
+def test_partitions_share_one_budget_and_clear_separately():
+    shared = framecache.FrameCache(max_bytes=3 * 40000)
+    a, b = shared.partition(), shared.partition()
+    a.put(1, Region())
+    a.put(2, Region())
+    b.put(1, Region())
+    assert 1 in a and 1 in b and len(shared) == 3
+
+    b.put(2, Region())  # estoura o limite global: sai o mais antigo (de a)
+    assert 1 not in a and len(shared) == 3
+
+    a.clear()
+    assert len(a) == 0 and len(b) == 2
+    b.discard(lambda key: key == 2)
+    assert 1 in b and 2 not in b
@@ -0,0 +1,66 @@
+'''
+Planejador de indicadores: nomes de saída repetidos e indicadores próprios.
+
+    python -m pytest -q test_indicators.py
+'''
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+
+
+def closes(n=300, seed=11):
+    rng = np.random.default_rng(seed)
+    return pd.Series(30 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+
+
+def test_same_output_with_different_params_raises():
+    with pytest.raises(ValueError, match="SMA"):
+        indicators.compute({"Close": closes()}, [("sma", {"period": 20}), ("sma", {"period": 50})])
+
+
+def test_identical_request_is_computed_once():
+    out = indicators.compute({"Close": closes()}, [("sma", {"period": 20}), ("sma", {})])
+    pd.testing.assert_series_equal(out["SMA"], closes().rolling(20).mean())
+
+
+@indicators.register("momentum", ["MOM"], lookback=lambda p: p["period"], period=10)
+def _momentum(p):
+    return {"MOM": (lambda close, n: close - close.shift(n), indicators.CLOSE, p["period"])}
+
+
+def make_frame(n=400):
+    close = closes(n)
+    return pd.DataFrame({'Date': pd.bdate_range('2015-01-01', periods=n), 'Open': close,
+                         'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                         'Volume': np.full(n, 1000.0)})
+
+
+def test_custom_indicator_reaches_simulator_frame():
+    from session import HeadlessSimulator
+
+    df = make_frame()
+    expected = df['Close'] - df['Close'].shift(60)
+    app = HeadlessSimulator()
+    app.extra_indicators = [("momentum", {"period": 60})]
+
+    # Cálculo completo e cauda incremental do feed
+    app.set_data(df.iloc[:300].copy())
+    app.append_bars(df.iloc[300:].copy())
+    np.testing.assert_allclose(app.df['MOM'], expected)
+
+    # Próximo sinal: a regra enxerga MOM e o aquecimento inclui o lookback dele
+    mask = app.signal_mask("MOM > -1000")
+    assert not mask[:60].any() and mask[60:].all()
+
+
+def test_custom_indicator_reaches_scanner():
+    from scanner import UniverseScanner
+
+    df = make_frame()
+    arrays = {field: df[[field]].to_numpy(float) for field in ('Open', 'High', 'Low', 'Close', 'Volume')}
+    scanner = UniverseScanner(pd.DatetimeIndex(df['Date']), ['AAA'], arrays,
+                              extra=[("momentum", {"period": 60})])
+    hits = scanner.scan("MOM > -1000")
+    assert len(hits) == len(df) - 60
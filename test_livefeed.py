@@ -0,0 +1,148 @@
+'''
+Testes do feed em memória compartilhada (livefeed.py) com o feed falso local.
+
+    python -m pytest -q test_livefeed.py
+'''
+import os
+import time
+import threading
+import numpy as np
+
+from livefeed import CandleAggregator, CandleRing, FakeTicker
+
+
+def unique_symbol(name):
+    # Um segmento por teste/processo, para não colidir com um ingest de verdade
+    return f"TEST:{name}_{os.getpid()}"
+
+
+def expected_candles(ticks, seconds):
+    # OHLC esperado por intervalo, direto dos ticks (preço, horário)
+    candles = {}
+    for price, ts in ticks:
+        t = int(ts) - int(ts) % seconds
+        if t not in candles:
+            candles[t] = [t, price, price, price, price]
+        else:
+            c = candles[t]
+            c[2] = max(c[2], price)
+            c[3] = min(c[3], price)
+            c[4] = price
+    return np.array(list(candles.values()))
+
+
+def as_rows(candles):
+    return np.column_stack([candles[name] for name in ('time', 'open', 'high', 'low', 'close')])
+
+
+def test_candles_match_ticks_and_seq_is_monotonic():
+    symbol = unique_symbol("det")
+    ring = CandleRing.create(symbol, capacity=64, candle_seconds=5)
+    reader = CandleRing.attach(symbol)
+    try:
+        aggregator = CandleAggregator(ring)
+        rng = np.random.default_rng(0)
+        prices = np.round(100 * np.cumprod(1 + rng.normal(0, 0.001, 300)), 2)
+        ticks = list(zip(prices, 1_700_000_000 + np.arange(300) * 0.7))
+
+        last_seq = reader.seq
+        for price, ts in ticks:
+            changed = aggregator.on_tick(float(price), float(ts))
+            seq, _ = reader.latest(1)
+            assert seq % 2 == 0
+            assert seq > last_seq if changed else seq == last_seq
+            last_seq = seq
+
+        expected = expected_candles(ticks, 5)
+        seq, candles = reader.latest(len(expected))
+        assert seq == ring.seq
+        np.testing.assert_array_equal(as_rows(candles), expected)
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_ring_wraps_keeping_latest_candles():
+    symbol = unique_symbol("wrap")
+    ring = CandleRing.create(symbol, capacity=8, candle_seconds=1)
+    reader = CandleRing.attach(symbol)
+    try:
+        aggregator = CandleAggregator(ring)
+        ticks = [(100.0 + i, 1_700_000_000 + i) for i in range(20)]
+        for price, ts in ticks:
+            aggregator.on_tick(price, ts)
+
+        _, candles = reader.latest(100)
+        np.testing.assert_array_equal(as_rows(candles), expected_candles(ticks, 1)[-8:])
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_fake_feed_with_concurrent_reader():
+    # Mesmo laço do run_ingest, com o FakeTicker e um leitor em paralelo
+    symbol = unique_symbol("fake")
+    tick = FakeTicker(symbol, interval=0.001)
+    ring = CandleRing.create(symbol, capacity=256, candle_seconds=1)
+    reader = CandleRing.attach(symbol)
+    errors = []
+    done = threading.Event()
+
+    def read_loop():
+        last_seq = -1
+        while not done.is_set():
+            seq, candles = reader.latest(16)
+            if seq % 2 or seq < last_seq:
+                errors.append(seq)
+            if len(candles) and not (np.all(candles['low'] <= candles['open'])
+                                     and np.all(candles['open'] <= candles['high'])
+                                     and np.all(candles['low'] <= candles['close'])
+                                     and np.all(candles['close'] <= candles['high'])):
+                errors.append(candles)
+            last_seq = seq
+
+    thread = threading.Thread(target=read_loop)
+    ticks = []
+    try:
+        tick.start()
+        thread.start()
+        aggregator = CandleAggregator(ring)
+        last_time = None
+        deadline = time.time() + 1.5
+        while time.time() < deadline:
+            state = tick.states.get(symbol)
+            if state and state["time"] != last_time:
+                aggregator.on_tick(state["price"], state["time"])
+                ticks.append((state["price"], state["time"]))
+                last_time = state["time"]
+            time.sleep(0.0005)
+    finally:
+        tick.stop()
+        done.set()
+        thread.join()
+
+    try:
+        assert not errors
+        assert len(ticks) > 10
+        expected = expected_candles(ticks, 1)
+        _, candles = reader.latest(len(expected))
+        np.testing.assert_array_equal(as_rows(candles), expected)
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_create_replaces_stale_segment():
+    # Ingest que caiu sem unlink deixa o segmento; o próximo create não pode falhar
+    symbol = unique_symbol("stale")
+    crashed = CandleRing.create(symbol, capacity=16, candle_seconds=5)
+    crashed.push(np.array((1.0, 1, 1, 1, 1), dtype=crashed.candles.dtype))
+    crashed.shm.close()
+
+    ring = CandleRing.create(symbol, capacity=32, candle_seconds=15)
+    try:
+        assert ring.seq == 0
+        assert len(ring.candles) == 32
+        assert ring.candle_seconds == 15
+    finally:
+        ring.close()
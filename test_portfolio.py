@@ -0,0 +1,61 @@
+'''
+Carteira: um salto (seek) tem que registrar a mesma curva de patrimônio e os
+mesmos trades que avançar candle a candle até o mesmo ponto.
+
+    python -m pytest -q test_portfolio.py
+'''
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio import PortfolioReplay
+
+START, END = 60, 400
+
+
+def make_frames(symbols=('AAA', 'BBB', 'CCC'), n=450, seed=5):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2015-01-01', periods=n)
+    frames = {}
+    for symbol in symbols:
+        close = 30 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        open_ = close * (1 + rng.normal(0, 0.005, n))
+        frames[symbol] = pd.DataFrame({'Date': dates, 'Open': open_,
+                                       'High': np.maximum(open_, close) * 1.01,
+                                       'Low': np.minimum(open_, close) * 0.99,
+                                       'Close': close, 'Volume': np.full(n, 1000.0)})
+    return frames
+
+
+def open_positions(pcts):
+    engine = PortfolioReplay(make_frames())
+    for j, (stop_pct, target_pct) in enumerate(pcts):
+        engine.buy(j, START, stop_pct, target_pct)
+    return engine
+
+
+def step(engine):
+    # Mesma sequência do forward(): ordens do candle e depois a marcação
+    for bar in range(START, END):
+        engine.run_orders(bar, bar + 1)
+        engine.record_equity(bar + 1)
+
+
+def seek(engine):
+    engine.run_orders(START, END, record_equity=True)
+
+
+@pytest.mark.parametrize("pcts", [
+    [(3.0, 5.0), (4.0, 6.0), (5.0, 8.0)],      # todas saem antes do fim do salto
+    [(3.0, 5.0), (None, None), (4.0, 6.0)],    # uma fica aberta até o fim
+    [(None, None), (None, None), (None, None)],
+])
+def test_seek_matches_step(pcts):
+    stepped, jumped = open_positions(pcts), open_positions(pcts)
+    step(stepped)
+    seek(jumped)
+
+    assert [t['exit_date'] for t in stepped.trades_history] == [t['exit_date'] for t in jumped.trades_history]
+    assert stepped.cash == pytest.approx(jumped.cash)
+    assert len(stepped.equity_curve) == len(jumped.equity_curve)
+    np.testing.assert_allclose(stepped.equity_curve, jumped.equity_curve)
@@ -0,0 +1,53 @@
+'''
+Scanner com ativos de datas diferentes: os sinais têm que ser os mesmos que o
+replay vê no ativo sozinho (indicadores e prev/cross nas datas do próprio ativo).
+
+    python -m pytest -q test_scanner.py
+'''
+import numpy as np
+import pandas as pd
+
+import indicators
+from scanner import UniverseScanner, evaluate_rule
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+def make_frame(dates, seed):
+    rng = np.random.default_rng(seed)
+    close = 30 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    return pd.DataFrame({'Date': dates, 'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                         'Close': close, 'Volume': rng.integers(10**5, 10**6, len(dates)).astype(float)})
+
+
+def universe(frames):
+    # Mesmo formato do datastore.load_universe: união das datas, NaN onde o ativo não negociou
+    dates = np.unique(np.concatenate([df['Date'].to_numpy() for df in frames.values()]))
+    arrays = {field: np.full((len(dates), len(frames)), np.nan) for field in FIELDS}
+    for j, df in enumerate(frames.values()):
+        rows = np.searchsorted(dates, df['Date'].to_numpy())
+        for field in FIELDS:
+            arrays[field][rows, j] = df[field]
+    return pd.DatetimeIndex(dates), list(frames), arrays
+
+
+def replay_signals(df, expr):
+    columns = {name: values.to_numpy() for name, values in indicators.compute_all(df['Close']).items()}
+    columns['Close'] = df['Close'].to_numpy()
+    mask = np.broadcast_to(evaluate_rule(expr, columns), len(df)).copy()
+    mask[:indicators.warmup()] = False
+    return set(df['Date'][mask])
+
+
+def test_signals_match_single_symbol_replay_across_gaps():
+    days = pd.bdate_range('2015-01-01', periods=600)
+    frames = {
+        'FULL': make_frame(days, 1),
+        'GAPS': make_frame(days[np.random.default_rng(3).random(600) > 0.3], 2),  # ~30% dos dias sem negócio
+    }
+    scanner = UniverseScanner(*universe(frames))
+
+    for expr in ("cross_above(MACD, MACD_SIGNAL)", "RSI < 30 and Close < BB_DN", "Close > prev(Close, 3)"):
+        hits = scanner.scan(expr)
+        for symbol, df in frames.items():
+            assert set(hits.loc[hits['Symbol'] == symbol, 'Date']) == replay_signals(df, expr), (symbol, expr)
@@ -0,0 +1,179 @@
+'''
+Agregação offline de ticks em candles OHLCV, direto para a base local.
+
+Lê arquivos de ticks (gravados ou de fornecedor) em blocos, calcula o
+candle de cada tick por divisão inteira do horário e reduz cada grupo com
+numpy (primeiro/máximo/mínimo/último/soma), sem loop por tick. Os candles
+prontos de cada bloco vão para datastore.append, então a memória fica
+limitada ao tamanho do bloco mesmo com arquivos de vários GB.
+
+Uso:
+    python tickagg.py PETR4_1m ticks_2024-05-*.csv --segundos 60
+    python tickagg.py PETR4_1m ticks_hoje.csv --segundos 60 --anexar
+
+Formato esperado: CSV com colunas de horário, preço e (opcional) volume,
+em ordem cronológica (os arquivos também). O horário pode ser epoch em
+segundos/milissegundos ou data/hora em texto; os candles ficam em UTC.
+Com --anexar, ticks no mesmo intervalo do último candle gravado completam
+esse candle (não geram outra linha com a mesma data).
+'''
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+import datastore
+
+NS = 10**9
+
+
+def to_ns(times):
+    # Coluna de horário -> int64 em ns UTC (epoch numérico ou texto)
+    if pd.api.types.is_numeric_dtype(times):
+        values = np.asarray(times, dtype=np.float64)
+        scale = 10**6 if len(values) and np.nanmax(values) > 1e11 else NS  # ms ou s
+        return (values * scale).astype(np.int64)
+    return pd.to_datetime(times, utc=True).dt.tz_convert(None).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+def read_ticks(path, time_col='time', price_col='price', volume_col='volume', chunksize=1_000_000):
+    # Gera (horário ns, preço, volume) em blocos de chunksize linhas
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [time_col, price_col] + ([volume_col] if volume_col in header else [])
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+        chunk = chunk.dropna(subset=[time_col, price_col])
+        volume = chunk[volume_col].to_numpy(dtype=np.float64) if volume_col in chunk else np.zeros(len(chunk))
+        yield to_ns(chunk[time_col]), chunk[price_col].to_numpy(dtype=np.float64), volume
+
+
+def aggregate(times_ns, prices, volumes, seconds):
+    # Candles dos ticks de um bloco: {bucket, open, high, low, close, volume}
+    bucket = times_ns // (seconds * NS)
+    if len(bucket) > 1 and np.any(bucket[1:] < bucket[:-1]):
+        # Fora de ordem dentro do bloco: ordena mantendo a ordem de chegada no mesmo horário
+        order = np.argsort(times_ns, kind='stable')
+        bucket, prices, volumes = bucket[order], prices[order], volumes[order]
+
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)]
+    return {
+        'bucket': bucket[starts],
+        'open': prices[starts],
+        'high': np.maximum.reduceat(prices, starts),
+        'low': np.minimum.reduceat(prices, starts),
+        'close': prices[ends - 1],
+        'volume': np.add.reduceat(volumes, starts),
+    }
+
+
+class BarStream:
+    # Junta os blocos: o último candle de um bloco pode continuar no próximo
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.pending = None  # último candle, ainda aberto
+
+    def seed(self, bar):
+        # Continua de um candle já gravado (anexar): ticks no mesmo intervalo entram nele
+        self.pending = {
+            'bucket': pd.Timestamp(bar['Date']).value // (self.seconds * NS),
+            'open': float(bar['Open']),
+            'high': float(bar['High']),
+            'low': float(bar['Low']),
+            'close': float(bar['Close']),
+            'volume': float(bar['Volume']),
+        }
+
+    def feed(self, times_ns, prices, volumes):
+        # Devolve os candles fechados até este bloco (DataFrame no formato da base)
+        if len(times_ns) == 0:
+            return self._frame(None)
+        bars = aggregate(times_ns, prices, volumes, self.seconds)
+
+        if self.pending is not None:
+            last = self.pending
+            if bars['bucket'][0] < last['bucket']:
+                raise ValueError("Ticks fora de ordem entre blocos/arquivos")
+            if bars['bucket'][0] == last['bucket']:
+                bars['open'][0] = last['open']
+                bars['high'][0] = max(bars['high'][0], last['high'])
+                bars['low'][0] = min(bars['low'][0], last['low'])
+                bars['volume'][0] += last['volume']
+                closed = None
+            else:
+                closed = last
+        else:
+            closed = None
+
+        self.pending = {name: values[-1] for name, values in bars.items()}
+        done = {name: values[:-1] for name, values in bars.items()}
+        if closed is not None:
+            done = {name: np.r_[closed[name], done[name]] for name in done}
+        return self._frame(done)
+
+    def flush(self):
+        done = self.pending
+        self.pending = None
+        if done is None:
+            return self._frame(None)
+        return self._frame({name: np.asarray([value]) for name, value in done.items()})
+
+    def _frame(self, bars):
+        if bars is None or len(bars['bucket']) == 0:
+            return pd.DataFrame(columns=datastore.COLUMNS)
+        return pd.DataFrame({
+            'Date': pd.to_datetime(bars['bucket'] * (self.seconds * NS)),
+            'Open': bars['open'],
+            'High': bars['high'],
+            'Low': bars['low'],
+            'Close': bars['close'],
+            'Volume': bars['volume'],
+        })
+
+
+def build(symbol, paths, seconds=60, append=False, chunksize=1_000_000, data_dir=datastore.DATA_DIR, **columns):
+    # Agrega os arquivos (em ordem) e grava os candles na base; devolve (ticks, candles)
+    path = datastore.symbol_path(symbol, data_dir)
+    if not append and os.path.exists(path):
+        os.remove(path)
+
+    stream = BarStream(seconds)
+    if append:
+        # O último candle gravado pode continuar nos ticks novos: sai do arquivo e
+        # volta pelo flush, em vez de virar duas linhas com a mesma data
+        last = datastore.pop_last(symbol, data_dir)
+        if last is not None and len(last):
+            stream.seed(last.iloc[0])
+
+    n_ticks = n_bars = 0
+    try:
+        for tick_path in paths:
+            for times_ns, prices, volumes in read_ticks(tick_path, chunksize=chunksize, **columns):
+                bars = stream.feed(times_ns, prices, volumes)
+                if len(bars):
+                    datastore.append(symbol, bars, data_dir)
+                n_ticks += len(times_ns)
+                n_bars += len(bars)
+    finally:
+        # Também em erro (ex.: ticks fora de ordem): o candle aberto não se perde
+        bars = stream.flush()
+        if len(bars):
+            datastore.append(symbol, bars, data_dir)
+    return n_ticks, n_bars + len(bars)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agrega arquivos de ticks em candles na base local")
+    parser.add_argument("symbol", help="nome do ativo na base (ex.: PETR4_1m)")
+    parser.add_argument("arquivos", nargs="+", help="CSVs de ticks em ordem cronológica")
+    parser.add_argument("--segundos", type=int, default=60)
+    parser.add_argument("--anexar", action="store_true", help="acrescenta à base em vez de substituir")
+    parser.add_argument("--col-tempo", default="time")
+    parser.add_argument("--col-preco", default="price")
+    parser.add_argument("--col-volume", default="volume")
+    parser.add_argument("--bloco", type=int, default=1_000_000, help="linhas lidas por vez")
+    args = parser.parse_args()
+
+    n_ticks, n_bars = build(args.symbol, args.arquivos, args.segundos, append=args.anexar,
+                            chunksize=args.bloco, time_col=args.col_tempo,
+                            price_col=args.col_preco, volume_col=args.col_volume)
+    print(f"{args.symbol}: {n_ticks} ticks -> {n_bars} candles de {args.segundos}s")
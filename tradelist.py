@@ -0,0 +1,269 @@
+'''
+Histórico de trades virtualizado.
+
+TradeStore guarda os trades em um array estruturado do numpy (cresce por
+dobra de capacidade); ordenação e filtro viram um vetor de índices sobre
+esse array. VirtualTradeList desenha em um Canvas só as linhas visíveis,
+reaproveitando os mesmos itens de texto ao rolar, então o custo de tela não
+depende de quantos trades existem.
+'''
+import numpy as np
+import pandas as pd
+import tkinter as tk
+from tkinter import ttk
+
+TRADE_DTYPE = np.dtype([
+    ('entry_date', 'datetime64[ns]'),
+    ('exit_date', 'datetime64[ns]'),
+    ('entry_price', 'f8'),
+    ('exit_price', 'f8'),
+    ('shares', 'i8'),
+    ('profit', 'f8'),
+    ('profit_pct', 'f8'),
+    ('label', 'U16'),
+])
+
+FILTERS = {
+    "Todos": None,
+    "Ganhos": lambda data: data['profit'] > 0,
+    "Perdas": lambda data: data['profit'] <= 0,
+}
+
+
+class TradeStore:
+    def __init__(self, capacity=1024):
+        self._data = np.zeros(capacity, dtype=TRADE_DTYPE)
+        self._size = 0
+
+        # Ordenação/filtro atuais (None = ordem de inserção, mais recente primeiro)
+        self.sort_key = None
+        self.descending = True
+        self.mask_func = None
+        self._view = None
+
+    @property
+    def data(self):
+        return self._data[:self._size]
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed <= len(self._data):
+            return
+        capacity = len(self._data)
+        while capacity < needed:
+            capacity *= 2
+        grown = np.zeros(capacity, dtype=TRADE_DTYPE)
+        grown[:self._size] = self.data
+        self._data = grown
+
+    def append(self, trade, label='Venda'):
+        self.extend([trade], label=label)
+
+    def extend(self, trades, label='Venda'):
+        # Aceita lista de dicts (formato do trades_history), DataFrame ou array estruturado
+        if isinstance(trades, np.ndarray):
+            n = len(trades)
+            columns = {name: trades[name] for name in trades.dtype.names}
+        else:
+            if not isinstance(trades, pd.DataFrame):
+                trades = pd.DataFrame(list(trades))
+            n = len(trades)
+            columns = {name: trades[name].to_numpy() for name in trades.columns}
+
+        if n == 0:
+            return
+
+        self._reserve(n)
+        block = self._data[self._size:self._size + n]
+        for name in TRADE_DTYPE.names:
+            if name in columns:
+                block[name] = columns[name]
+            elif name == 'label':
+                block[name] = columns['symbol'] if 'symbol' in columns else label
+        self._size += n
+        self._view = None
+
+    def clear(self):
+        self._size = 0
+        self._view = None
+
+    def set_sort(self, key, descending=True):
+        self.sort_key = key
+        self.descending = descending
+        self._view = None
+
+    def set_filter(self, mask_func):
+        self.mask_func = mask_func
+        self._view = None
+
+    def view(self):
+        # Índices (no array de dados) na ordem em que devem aparecer
+        if self._view is None:
+            data = self.data
+            if self.mask_func is not None:
+                idx = np.flatnonzero(self.mask_func(data))
+            else:
+                idx = np.arange(self._size)
+
+            if self.sort_key is not None:
+                idx = idx[np.argsort(data[self.sort_key][idx], kind='stable')]
+
+            if self.descending:
+                idx = idx[::-1]
+            self._view = idx
+        return self._view
+
+    def __len__(self):
+        return len(self.view())
+
+    def row(self, k):
+        return self._data[self.view()[k]]
+
+
+class VirtualTradeList(tk.Frame):
+    ROW_HEIGHT = 18
+
+    # (título, campo do TradeStore)
+    COLUMNS = [
+        ('Data', 'exit_date'),
+        ('Tipo', 'label'),
+        ('Preço', 'exit_price'),
+        ('Result %', 'profit_pct'),
+    ]
+
+    def __init__(self, master, store=None, bg='#2b2b2b'):
+        super().__init__(master, bg=bg)
+        self.store = store if store is not None else TradeStore()
+        self.first = 0
+        self.visible_rows = 0
+        self._rows = []  # pool de itens do canvas: (fundo, [textos])
+
+        # ===== Filtro =====
+        filter_frame = tk.Frame(self, bg=bg)
+        filter_frame.pack(side=tk.TOP, fill=tk.X)
+        tk.Label(filter_frame, text="Mostrar:", bg=bg, fg='#aaaaaa',
+                 font=('Arial', 9)).pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar(value="Todos")
+        filter_box = ttk.Combobox(filter_frame, textvariable=self.filter_var, state='readonly',
+                                  values=list(FILTERS), width=8)
+        filter_box.pack(side=tk.LEFT, padx=5)
+        filter_box.bind("<<ComboboxSelected>>", lambda e: self.set_filter(self.filter_var.get()))
+
+        # ===== Cabeçalho (clique ordena) =====
+        header = tk.Frame(self, bg=bg)
+        header.pack(side=tk.TOP, fill=tk.X)
+        for col, (title, field) in enumerate(self.COLUMNS):
+            tk.Button(header, text=title, command=lambda f=field: self.sort_by(f),
+                      bg='#4a4a4a', fg='white', font=('Arial', 9), relief=tk.FLAT,
+                      bd=0).grid(row=0, column=col, sticky='ew', padx=1)
+            header.grid_columnconfigure(col, weight=1, uniform='col')
+
+        # ===== Corpo =====
+        self.canvas = tk.Canvas(self, bg='#1e1e1e', highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.canvas.bind("<Configure>", lambda e: self.render())
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", lambda e: self.yview('scroll', -3, 'units'))
+        self.canvas.bind("<Button-5>", lambda e: self.yview('scroll', 3, 'units'))
+
+    # ===== Dados =====
+    def append(self, trade, label='Venda'):
+        self.store.append(trade, label=label)
+        self.render()
+
+    def load(self, trades, label='Venda'):
+        # Carga em bloco (ex.: todos os trades de um backtest) com um único redesenho
+        self.store.extend(trades, label=label)
+        self.first = 0
+        self.render()
+
+    def clear(self):
+        self.store.clear()
+        self.first = 0
+        self.render()
+
+    def sort_by(self, field):
+        descending = not self.store.descending if self.store.sort_key == field else True
+        self.store.set_sort(field, descending)
+        self.first = 0
+        self.render()
+
+    def set_filter(self, name):
+        self.store.set_filter(FILTERS[name])
+        self.first = 0
+        self.render()
+
+    # ===== Rolagem =====
+    def yview(self, *args):
+        total = len(self.store)
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= max(1, self.visible_rows - 1)
+            self.first += step
+        self.render()
+
+    def _on_wheel(self, event):
+        self.yview('scroll', -3 if event.delta > 0 else 3, 'units')
+
+    # ===== Desenho =====
+    def _ensure_rows(self, count, width):
+        col_width = width / len(self.COLUMNS)
+        while len(self._rows) < count:
+            y = len(self._rows) * self.ROW_HEIGHT
+            bg = self.canvas.create_rectangle(0, y, width, y + self.ROW_HEIGHT, width=0, fill='#1e1e1e')
+            texts = [
+                self.canvas.create_text((c + 0.5) * col_width, y + self.ROW_HEIGHT / 2,
+                                        text="", fill='white', font=('Arial', 9))
+                for c in range(len(self.COLUMNS))
+            ]
+            self._rows.append((bg, texts))
+
+        # Reposiciona horizontalmente se a largura mudou
+        for r, (bg, texts) in enumerate(self._rows):
+            y = r * self.ROW_HEIGHT
+            self.canvas.coords(bg, 0, y, width, y + self.ROW_HEIGHT)
+            for c, item in enumerate(texts):
+                self.canvas.coords(item, (c + 0.5) * col_width, y + self.ROW_HEIGHT / 2)
+
+    def render(self):
+        width = max(1, self.canvas.winfo_width())
+        height = max(1, self.canvas.winfo_height())
+        self.visible_rows = height // self.ROW_HEIGHT + 1
+
+        total = len(self.store)
+        self.first = max(0, min(self.first, total - self.visible_rows + 1))
+
+        if len(self._rows) < self.visible_rows or width != getattr(self, '_width', None):
+            self._ensure_rows(self.visible_rows, width)
+            self._width = width
+
+        for r, (bg, texts) in enumerate(self._rows):
+            k = self.first + r
+            if r >= self.visible_rows or k >= total:
+                self.canvas.itemconfigure(bg, state=tk.HIDDEN)
+                for item in texts:
+                    self.canvas.itemconfigure(item, state=tk.HIDDEN)
+                continue
+
+            rec = self.store.row(k)
+            color = '#00ff00' if rec['profit'] > 0 else '#ff0000'
+            values = (
+                pd.Timestamp(rec['exit_date']).strftime('%d/%m/%y'),
+                str(rec['label']),
+                f"{rec['exit_price']:.2f}",
+                f"{rec['profit_pct']:+.2f}%",
+            )
+            self.canvas.itemconfigure(bg, state=tk.NORMAL, fill='#1e1e1e' if k % 2 == 0 else '#262626')
+            for item, value in zip(texts, values):
+                self.canvas.itemconfigure(item, state=tk.NORMAL, text=value, fill=color)
+
+        if total == 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible_rows) / total))
@@ -0,0 +1,100 @@
+'''
+VWAP e perfil de volume (volume por preço) de qualquer janela em O(faixas).
+
+Tudo sai de somas acumuladas calculadas uma vez por série:
+
+  - preço típico x volume e volume: VWAP da janela [start, end) ancorado no
+    primeiro candle, sem somar a janela de novo a cada frame;
+  - histograma acumulado do volume por faixa de preço (cada candle entra na
+    faixa do seu preço típico): o perfil de [start, end) é a diferença de
+    duas linhas, custo proporcional ao número de faixas e não de candles.
+
+As faixas são geométricas (largura relativa fixa, ~0,5% por padrão), então a
+resolução é a mesma em qualquer nível de preço. Para séries muito longas o
+histograma acumulado é guardado a cada `stride` candles (limite de memória
+em max_cells) e as pontas são completadas com no máximo stride candles;
+janelas de até 2 x stride candles são somadas direto, o que é mais barato.
+
+    profile = volumeprofile.for_frame(df)
+    profile.vwap(100, 150)                 # linha do VWAP da janela
+    edges, volume = profile.histogram(100, 150)
+'''
+import weakref
+import numpy as np
+
+# id(df) -> (weakref do df, número de candles, VolumeProfile)
+_profiles = {}
+
+
+class VolumeProfile:
+    def __init__(self, highs, lows, closes, volumes, step=0.005, max_bins=2000, max_cells=2_000_000):
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+        closes = np.asarray(closes, dtype=np.float64)
+        self.volumes = np.nan_to_num(np.asarray(volumes, dtype=np.float64))
+        typical = np.nan_to_num((highs + lows + closes) / 3)
+        n = len(typical)
+
+        # ===== VWAP: somas acumuladas (posição i = soma dos candles < i) =====
+        self.cum_pv = np.r_[0.0, np.cumsum(typical * self.volumes)]
+        self.cum_v = np.r_[0.0, np.cumsum(self.volumes)]
+
+        # ===== Faixas de preço =====
+        lo = float(np.nanmin(lows)) if n else 0.0
+        hi = float(np.nanmax(highs)) if n else 1.0
+        if lo > 0 and hi > lo:
+            bins = int(min(max_bins, max(1, np.ceil(np.log(hi / lo) / np.log1p(step)))))
+            self.edges = np.geomspace(lo, hi, bins + 1)
+        else:
+            bins = 200
+            self.edges = np.linspace(lo, hi if hi > lo else lo + 1, bins + 1)
+        self.bins = bins
+        self.bin_of = np.clip(np.searchsorted(self.edges, typical, side='right') - 1, 0, bins - 1)
+
+        # ===== Histograma acumulado, uma linha a cada stride candles =====
+        self.stride = max(1, int(np.ceil((n + 1) * bins / max_cells)))
+        blocks = -(-n // self.stride)
+        per_block = np.bincount(np.arange(n) // self.stride * bins + self.bin_of,
+                                weights=self.volumes, minlength=blocks * bins).reshape(blocks, bins)
+        self.cum_hist = np.vstack([np.zeros((1, bins)), np.cumsum(per_block, axis=0)])
+
+    def __len__(self):
+        return len(self.volumes)
+
+    def _hist_before(self, i):
+        # Volume por faixa dos candles < i
+        k = i // self.stride
+        hist = self.cum_hist[k]
+        first = k * self.stride
+        if first == i:
+            return hist
+        return hist + np.bincount(self.bin_of[first:i], weights=self.volumes[first:i], minlength=self.bins)
+
+    def histogram(self, start, end):
+        # (bordas das faixas, volume por faixa) da janela [start, end)
+        if end - start <= 2 * self.stride:
+            # Janela curta: somar direto custa menos que completar as duas pontas (até stride cada)
+            return self.edges, np.bincount(self.bin_of[start:end], weights=self.volumes[start:end],
+                                           minlength=self.bins)
+        return self.edges, self._hist_before(end) - self._hist_before(start)
+
+    def vwap(self, start, end):
+        # VWAP ancorado em start, um valor por candle da janela (NaN sem volume)
+        pv = self.cum_pv[start + 1:end + 1] - self.cum_pv[start]
+        v = self.cum_v[start + 1:end + 1] - self.cum_v[start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(v > 0, pv / v, np.nan)
+
+
+def for_frame(df):
+    # Perfil do DataFrame (refeito se o df ganhou candles); sai do cache junto com o df
+    key = id(df)
+    entry = _profiles.get(key)
+    if entry is not None and entry[0]() is df and entry[1] == len(df):
+        return entry[2]
+
+    profile = VolumeProfile(df['High'].to_numpy(), df['Low'].to_numpy(),
+                            df['Close'].to_numpy(), df['Volume'].to_numpy())
+    ref = weakref.ref(df, lambda _, key=key: _profiles.pop(key, None))
+    _profiles[key] = (ref, len(df), profile)
+    return profile